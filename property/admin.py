@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PropertyRecord
+from .models import PropertyRecord, SyncJob
 
 @admin.register(PropertyRecord)
 class PropertyRecordAdmin(admin.ModelAdmin):
@@ -23,4 +23,12 @@ class PropertyRecordAdmin(admin.ModelAdmin):
     search_fields = ('property_id', 'final_market_name', 'hub', 'city')
 
     # Allow status editing directly from the list
-    list_editable = ('status',)
\ No newline at end of file
+    list_editable = ('status',)
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'phase', 'attempts', 'processed_folders', 'failed_folders',
+                    'total_folders', 'started_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = [field.name for field in SyncJob._meta.fields]
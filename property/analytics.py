@@ -0,0 +1,152 @@
+"""
+Approval rates and revenue/rent totals by zone, circle, hub and month.
+
+Everything the dashboard panel and the analytics API show is read from
+ApprovalSummary, one row per (zone, circle, hub, month). sync_drive rebuilds the
+whole table with pandas after each run; in between, saves and deletes refresh
+just the groups they touched.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import ApprovalSummary, PropertyRecord
+
+# Status value -> ApprovalSummary counter; anything else only counts towards ``records``
+STATUS_COLUMNS = {
+    'Approved': 'approved',
+    'Conditionally Approved': 'conditionally_approved',
+    'Dropped/Rejected': 'rejected',
+    'Hold': 'on_hold',
+    'pending': 'pending',
+}
+GROUP_FIELDS = ('zone_name', 'circle', 'hub', 'month')
+# Record fields that move a record between groups, and everything the summary depends on
+GROUPING_FIELDS = ('zone_name', 'circle', 'hub', 'presentation_date')
+SUMMARY_FIELDS = GROUPING_FIELDS + ('status', 'projected_revenue_value', 'total_rent_value')
+SUMMARY_BATCH_SIZE = 1000
+CENTS = Decimal('0.01')
+
+
+def group_of(record):
+    """(zone, circle, hub, month) key of a record."""
+    presented = record.presentation_date
+    month = presented.replace(day=1) if presented else None
+    return record.zone_name, record.circle, record.hub, month
+
+
+def rebuild_summary():
+    """Recomputes every summary row in one pass over the table; returns the number of groups."""
+    # Imported here so web workers, which only read the summary, never load pandas
+    import pandas as pd
+
+    columns = list(GROUPING_FIELDS) + ['status', 'revenue', 'rent']
+    rows = PropertyRecord.objects.order_by().values_list(
+        *GROUPING_FIELDS, 'status', 'projected_revenue_value', 'total_rent_value')
+    frame = pd.DataFrame.from_records(rows.iterator(chunk_size=SUMMARY_BATCH_SIZE), columns=columns)
+
+    summaries = []
+    if not frame.empty:
+        frame['month'] = pd.to_datetime(frame['presentation_date']).dt.to_period('M').dt.start_time
+        for status, column in STATUS_COLUMNS.items():
+            frame[column] = (frame['status'] == status).astype('int64')
+        for column in ('revenue', 'rent'):
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+
+        totals = frame.groupby(list(GROUP_FIELDS), dropna=False, sort=False).agg(
+            records=('status', 'size'),
+            **{column: (column, 'sum') for column in STATUS_COLUMNS.values()},
+            revenue_total=('revenue', 'sum'),
+            rent_total=('rent', 'sum'),
+        ).reset_index()
+
+        for row in totals.itertuples(index=False):
+            summaries.append(ApprovalSummary(
+                zone_name=_key(row.zone_name), circle=_key(row.circle), hub=_key(row.hub),
+                month=None if pd.isna(row.month) else row.month.date(),
+                records=int(row.records),
+                **{column: int(getattr(row, column)) for column in STATUS_COLUMNS.values()},
+                revenue_total=_money(row.revenue_total),
+                rent_total=_money(row.rent_total),
+            ))
+
+    with transaction.atomic():
+        ApprovalSummary.objects.all().delete()
+        ApprovalSummary.objects.bulk_create(summaries, batch_size=SUMMARY_BATCH_SIZE)
+    return len(summaries)
+
+
+def _key(value):
+    # groupby(dropna=False) hands NULL group keys back as NaN
+    return None if value is None or value != value else value
+
+
+def _money(value):
+    return Decimal(repr(float(value))).quantize(CENTS)
+
+
+def _equals(field, value):
+    return {f'{field}__isnull': True} if value is None else {field: value}
+
+
+def _record_filter(zone_name, circle, hub, month):
+    lookups = {**_equals('zone_name', zone_name), **_equals('circle', circle), **_equals('hub', hub)}
+    if month is None:
+        lookups['presentation_date__isnull'] = True
+    else:
+        lookups['presentation_date__gte'] = month
+        lookups['presentation_date__lt'] = (month + datetime.timedelta(days=32)).replace(day=1)
+    return lookups
+
+
+def refresh_groups(groups):
+    """Recomputes the summary rows for the given (zone, circle, hub, month) keys from their records."""
+    aggregates = {column: Count('id', filter=Q(status=status)) for status, column in STATUS_COLUMNS.items()}
+    with transaction.atomic():
+        for group in set(groups):
+            totals = PropertyRecord.objects.filter(**_record_filter(*group)).aggregate(
+                records=Count('id'), revenue_total=Sum('projected_revenue_value'),
+                rent_total=Sum('total_rent_value'), **aggregates)
+            key = dict(zip(GROUP_FIELDS, group))
+            lookup = {}
+            for field, value in key.items():
+                lookup.update(_equals(field, value))
+            ApprovalSummary.objects.filter(**lookup).delete()
+            if totals['records']:
+                totals['revenue_total'] = totals['revenue_total'] or 0
+                totals['rent_total'] = totals['rent_total'] or 0
+                ApprovalSummary.objects.create(**key, **totals)
+
+
+# --- Reading ---
+BREAKDOWNS = {'zone': 'zone_name', 'circle': 'circle', 'hub': 'hub', 'month': 'month'}
+
+
+def summarize(by='zone', **filters):
+    """
+    Rolls the summary rows up to one entry per ``by`` value (zone, circle, hub
+    or month), optionally narrowed by zone/circle/hub equality filters.
+    """
+    field = BREAKDOWNS[by]
+    rows = ApprovalSummary.objects.filter(**{BREAKDOWNS[name]: value for name, value in filters.items() if value})
+    rows = rows.values(field).annotate(
+        records=Sum('records'),
+        **{column: Sum(column) for column in STATUS_COLUMNS.values()},
+        revenue_total=Sum('revenue_total'),
+        rent_total=Sum('rent_total'),
+    ).order_by(field)
+
+    results = []
+    for row in rows:
+        decided = row['approved'] + row['conditionally_approved'] + row['rejected']
+        for column in ('revenue_total', 'rent_total'):
+            row[column] = row[column].quantize(CENTS)
+        results.append({
+            'group': row.pop(field),
+            **row,
+            # Share of decided properties (approved, conditional or rejected) that went through
+            'approval_rate': round((row['approved'] + row['conditionally_approved']) / decided, 4) if decided else None,
+        })
+    return results
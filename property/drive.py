@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import google_auth_httplib2
+import httplib2
+from django.conf import settings
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaIoBaseDownload
+
+SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+SLIDES_MIME_TYPE = 'application/vnd.google-apps.presentation'
+PPTX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+
+class DriveClient:
+    """
+    Thread-safe Drive client shared by the web tier and sync workers.
+
+    Credentials are loaded once and refreshed in place when they expire. The
+    ``service`` object is built once from the discovery document bundled with
+    google-api-python-client; since httplib2 is not thread-safe, each thread
+    executes requests over its own persistent ``AuthorizedHttp``. Plain HTTP
+    fetches (e.g. thumbnail bytes) go through a pooled ``requests`` session.
+    """
+
+    def __init__(self, credentials, timeout=10):
+        self.timeout = timeout
+        self.credentials = credentials
+        self.service = build('drive', 'v3', credentials=self.credentials,
+                             static_discovery=True, cache_discovery=False)
+        self.session = AuthorizedSession(self.credentials)
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _ensure_fresh(self):
+        if self.credentials.valid:
+            return
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited
+            if not self.credentials.valid:
+                self.credentials.refresh(Request())
+
+    def _http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self.credentials, http=httplib2.Http(timeout=self.timeout))
+            self._local.http = http
+        return http
+
+    def execute(self, request):
+        self._ensure_fresh()
+        return request.execute(http=self._http())
+
+    def get_file(self, file_id, fields):
+        return self.execute(self.service.files().get(fileId=file_id, fields=fields))
+
+    def download(self, request, fh, chunksize=4 * 1024 * 1024):
+        """Streams a media request (``get_media``/``export_media``) into ``fh`` chunk by chunk."""
+        self._ensure_fresh()
+        request.http = self._http()
+        downloader = MediaIoBaseDownload(fh, request, chunksize=chunksize)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+
+    def fetch(self, url):
+        self._ensure_fresh()
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+
+class DownloadStore:
+    """
+    Content-addressed on-disk store for files downloaded by ``sync_drive``.
+
+    Entries are named ``<drive id>-<checksum><suffix>``, where the checksum is
+    Drive's ``md5Checksum`` (or a hash of ``modifiedTime`` for native Slides,
+    which have none), so an unchanged file is served without any network
+    transfer and a changed one can never be mistaken for its old version.
+    Total size is bounded, evicting least recently used entries first.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+
+    def _key(self, file_meta):
+        checksum = file_meta.get('md5Checksum')
+        if not checksum:
+            checksum = hashlib.md5((file_meta.get('modifiedTime') or '').encode()).hexdigest()
+        return f"{file_meta['id']}-{checksum}"
+
+    def fetch(self, drive, file_meta, suffix):
+        """
+        Local path for a Drive file, downloading it only if the store lacks this
+        version. ``file_meta`` is the listing entry (``id``, ``mimeType``,
+        ``md5Checksum``, ``modifiedTime``), so no extra metadata call is needed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        key = self._key(file_meta)
+        path = os.path.join(self.directory, key + suffix)
+        if os.path.exists(path):
+            os.utime(path)  # Bump recency so eviction stays LRU
+            with self._lock:
+                self.hits += 1
+            return path
+
+        files = drive.service.files()
+        if file_meta['mimeType'] == SLIDES_MIME_TYPE:
+            request = files.export_media(fileId=file_meta['id'], mimeType=PPTX_MIME_TYPE)
+        else:
+            request = files.get_media(fileId=file_meta['id'])
+
+        # Stream chunks straight to disk, then publish atomically
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                drive.download(request, fh)
+                size = fh.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self.downloads += 1
+            self.bytes_downloaded += size
+            self._drop_old_versions(file_meta['id'], path)
+            self._evict()
+        return path
+
+    def _drop_old_versions(self, file_id, keep_path):
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.startswith(file_id + '-') and item.path != keep_path:
+                    try:
+                        os.remove(item.path)
+                    except FileNotFoundError:
+                        pass
+
+    def _evict(self):
+        entries, total = [], 0
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith('.part'):
+                    continue
+                stat = item.stat()
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_drive_client():
+    """Returns the shared client, or ``None`` if no token has been provisioned."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                token_path = os.path.join(settings.BASE_DIR, 'token.json')
+                if not os.path.exists(token_path):
+                    return None
+                _client = DriveClient(Credentials.from_authorized_user_file(token_path, SCOPES))
+    return _client
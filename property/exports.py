@@ -0,0 +1,137 @@
+"""
+Streaming exports of filtered PropertyRecord querysets.
+
+Rows are read with QuerySet.iterator() in chunks and written out as they
+arrive, so exporting the whole table keeps memory flat regardless of its size,
+whether the app is served through wsgi.py or asgi.py (see streamed()).
+"""
+import csv
+import json
+from decimal import Decimal
+
+import xlsxwriter
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_CHUNK_ROWS = 2000
+# Rows are grouped into writes of about this size so compression has something to work with
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+
+def buffered(pieces, size=EXPORT_FLUSH_BYTES):
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_ndjson(queryset, serializer):
+    """One JSON object per line; ``serializer`` is a single instance reused for every row."""
+    for record in queryset.iterator(chunk_size=EXPORT_CHUNK_ROWS):
+        yield json.dumps(serializer.to_representation(record), cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+
+# (header, column) for the dashboard exports; numeric copies are preferred so
+# spreadsheets can sum them
+EXPORT_COLUMNS = [
+    ('Presentation Date', 'presentation_date'),
+    ('Zone', 'zone_name'),
+    ('Circle', 'circle'),
+    ('Hub', 'hub'),
+    ('Hub Rank', 'hub_rank'),
+    ('City', 'city'),
+    ('City Rank', 'city_rank'),
+    ('Market', 'final_market_name'),
+    ('Proj. Revenue (L)', 'projected_revenue_value'),
+    ('Total Rent', 'total_rent_value'),
+    ('Status', 'status'),
+    ('Remarks', 'remarks'),
+    ('PPT', 'ppt_link'),
+    ('AI Summary', 'ai_summary_link'),
+    ('Recording', 'recording_link'),
+]
+# Raw slide text shown when the numeric copy is NULL ("N/A" or unparseable)
+EXPORT_FALLBACKS = {
+    'projected_revenue_value': 'projected_revenue_lakhs',
+    'total_rent_value': 'total_rent_maintenance',
+}
+
+
+def export_rows(queryset):
+    """Yields one list per record in EXPORT_COLUMNS order, read as tuples rather than model instances."""
+    columns = [column for _, column in EXPORT_COLUMNS]
+    fallbacks = [(columns.index(column), len(columns) + i) for i, column in enumerate(EXPORT_FALLBACKS)]
+    rows = queryset.values_list(*columns, *EXPORT_FALLBACKS.values())
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_ROWS):
+        values = list(row[:len(columns)])
+        for index, fallback in fallbacks:
+            if values[index] is None:
+                values[index] = row[fallback]
+        yield values
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'  # BOM, so Excel opens the file as UTF-8
+    yield writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    for values in export_rows(queryset):
+        yield writer.writerow(values)
+
+
+def write_xlsx(queryset, fh):
+    """
+    Writes the export to ``fh`` with xlsxwriter's constant_memory mode, which
+    flushes each row to disk as soon as the next one starts.
+    """
+    workbook = xlsxwriter.Workbook(fh, {'constant_memory': True, 'remove_timezone': True})
+    sheet = workbook.add_worksheet('Properties')
+    header = workbook.add_format({'bold': True})
+    date = workbook.add_format({'num_format': 'dd mmm yyyy'})
+
+    sheet.write_row(0, 0, [name for name, _ in EXPORT_COLUMNS], header)
+    sheet.freeze_panes(1, 0)
+    sheet.set_column(0, 0, 14)
+    sheet.set_column(1, len(EXPORT_COLUMNS) - 1, 18)
+
+    for row, values in enumerate(export_rows(queryset), start=1):
+        presented = values[0]
+        if presented is not None:
+            sheet.write_datetime(row, 0, presented, date)
+        # write_row skips None (blank) cells and writes Decimals as numbers
+        sheet.write_row(row, 1, [float(v) if isinstance(v, Decimal) else v for v in values[1:]])
+    workbook.close()
+
+
+# --- Serving under ASGI ---
+async def _aiter_sync(iterator):
+    # Each chunk is produced on the request's sync thread, which owns the database
+    # connection the queryset iterator reads from
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while (chunk := await next_chunk(iterator, done)) is not done:
+        yield chunk
+
+
+def streamed(request, response):
+    """
+    Under ASGI, Django reads a synchronous streaming body (including a
+    FileResponse's) into a list before sending any of it; there the body is
+    swapped for an async iterator that pulls one chunk at a time. Under WSGI
+    the response is returned as is.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest) and not response.is_async:
+        response.streaming_content = _aiter_sync(iter(response.streaming_content))
+    return response
@@ -0,0 +1,377 @@
+"""
+Text extraction for the files sync_drive downloads from Drive.
+
+These are module-level functions (rather than Command methods) so they can be
+shipped to worker processes by the sync pipeline.
+"""
+import datetime
+import io
+import posixpath
+import re
+import time
+import zipfile
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlparse, parse_qs
+from xml.etree import ElementTree
+
+import dateutil.parser as dparser
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+
+def _empty_ppt_info():
+    return {'circle': None, 'hub': None, 'hub_rank': None, 'city': None,
+            'city_rank': None, 'final_market_name': None, 'zone_name': None,
+            'revenue': "N/A", 'rent': "N/A", 'revenue_value': None, 'rent_value': None}
+
+
+def parse_amount(text):
+    """Decimal value of an extracted figure such as "12.5" or "1,20,000"; ``None`` for "N/A"."""
+    if not text:
+        return None
+    try:
+        value = Decimal(str(text).replace(',', '').strip())
+    except InvalidOperation:
+        return None
+    # Guard against numbers that won't fit the DecimalField (max_digits=14, 2 places)
+    if not value.is_finite() or abs(value) >= Decimal('1e12'):
+        return None
+    return value.quantize(Decimal('0.01'))
+
+
+def _parse_header(slide1_text, results):
+    """Zone and market hierarchy from the first slide's text."""
+    zone_match = re.search(r"ZONE\s*:\s*(.*?)(?:\s*STATE|\s*CITY|\s*PIN CODE|$)", slide1_text,
+                           re.IGNORECASE | re.DOTALL)
+    if zone_match:
+        results['zone_name'] = re.sub(r'\s*\[Image \d+\]\s*', '', zone_match.group(1)).strip()
+
+    market_match = re.search(r".*?_.*?\(.*?\)_.*?\(.*?\)_.*", slide1_text, re.IGNORECASE)
+    if market_match:
+        parts = market_match.group(0).strip().split('_')
+        if len(parts) >= 4:
+            results['final_market_name'] = parts[-1].strip()
+            for key, part_idx, rank_key in [('city', -2, 'city_rank'), ('hub', -3, 'hub_rank')]:
+                p = parts[part_idx].strip()
+                m = re.search(r"(.*?)\s*\((.*?)\)", p)
+                results[key] = m.group(1).strip() if m else p
+                results[rank_key] = m.group(2).strip() if m else None
+            results['circle'] = re.sub(r'^(Add|BD|Presentation|PPT)\s*', '', parts[-4].strip(),
+                                       flags=re.IGNORECASE).strip()
+
+
+def _parse_financials(txt, results):
+    """Revenue and rent figures from one slide's text, if not already found."""
+    if results['revenue'] == "N/A":
+        rev_m = re.search(r'GeoIQ Revenue Projection 2025.*?\n?([\d,.]+)', txt, re.IGNORECASE | re.DOTALL)
+        if rev_m: results['revenue'] = rev_m.group(1).replace(',', '')
+    if results['rent'] == "N/A":
+        rent_m = re.search(r'Total Rent \+ Maintenance.*?\n?([\d,.]+)', txt, re.IGNORECASE | re.DOTALL)
+        if rent_m: results['rent'] = rent_m.group(1).replace(',', '')
+    results['revenue_value'] = parse_amount(results['revenue'])
+    results['rent_value'] = parse_amount(results['rent'])
+
+
+def extract_all_ppt_info(path):
+    """Reference python-pptx implementation; see ``extract_pptx`` for the fast path."""
+    results = _empty_ppt_info()
+    try:
+        prs = Presentation(path)
+        if not prs.slides: return results
+        first_slide = prs.slides[0]
+        slide1_text = "".join([shape.text + "\n" for shape in first_slide.shapes if hasattr(shape, "text")])
+
+        _parse_header(slide1_text, results)
+
+        for slide in prs.slides:
+            txt = ""
+            for shape in slide.shapes:
+                if hasattr(shape, "text"): txt += shape.text + " "
+                if shape.shape_type == MSO_SHAPE_TYPE.TABLE:
+                    for row in shape.table.rows:
+                        for cell in row.cells: txt += cell.text + " "
+            _parse_financials(txt, results)
+        return results
+    except Exception:
+        return results
+
+
+def classify_status(lines):
+    """Approval status from the closing lines of an AI summary."""
+    if not lines: return 'pending'
+    context = " ".join(lines[-2:]).lower()
+    if 'conditionally approved' in context:
+        return 'Conditionally Approved'
+    elif 'approved' in context:
+        return 'Approved'
+    elif any(x in context for x in ['rejected', 'dropped', 'not feasible']):
+        return 'Dropped/Rejected'
+    elif 'hold' in context:
+        return 'Hold'
+    return 'pending'
+
+
+def tail_pdf_lines(path, count=2):
+    """
+    Last ``count`` non-empty lines of a PDF. Only the final page is laid out;
+    earlier pages are added one at a time, only if needed to reach ``count``.
+    """
+    lines = []
+    with open(path, 'rb') as fp:
+        document = PDFDocument(PDFParser(fp))
+        # Building page objects only walks the page tree; no content is parsed
+        pages = list(PDFPage.create_pages(document))
+        rsrcmgr = PDFResourceManager()
+        for page in reversed(pages):
+            with io.StringIO() as output:
+                device = TextConverter(rsrcmgr, output, laparams=LAParams())
+                PDFPageInterpreter(rsrcmgr, device).process_page(page)
+                device.close()
+                page_lines = [l.strip() for l in output.getvalue().split('\n') if l.strip()]
+            lines = page_lines + lines
+            if len(lines) >= count:
+                break
+    return lines[-count:]
+
+
+def extract_status_from_pdf(path):
+    try:
+        return classify_status(tail_pdf_lines(path))
+    except:
+        return 'pending'
+
+
+def extract_retail_link(path):
+    """Reference python-pptx implementation; see ``extract_pptx`` for the fast path."""
+    try:
+        prs = Presentation(path)
+        for slide in prs.slides:
+            for shape in slide.shapes:
+                if not shape.has_text_frame: continue
+                for para in shape.text_frame.paragraphs:
+                    for run in para.runs:
+                        if "RetailIQ" in run.text and run.hyperlink and run.hyperlink.address:
+                            return run.hyperlink.address
+    except:
+        return None
+    return None
+
+
+# --- Single-pass streaming PPTX extraction ---
+# Slide text kept for full-text search; the slides read before the early stop are the ones that matter
+SLIDE_TEXT_MAX_CHARS = 20_000
+_P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+
+def _read_rels(zf, part_name):
+    """Maps rId -> target for a part's ``_rels/*.rels`` file."""
+    rels_name = posixpath.join(posixpath.dirname(part_name), '_rels', posixpath.basename(part_name) + '.rels')
+    try:
+        with zf.open(rels_name) as f:
+            return {rel.get('Id'): rel.get('Target') for rel in ElementTree.parse(f).getroot().iter(_PKG_REL)}
+    except KeyError:
+        return {}
+
+
+def _slide_part_names(zf):
+    """Slide part names in presentation order (``p:sldIdLst``), not zip order."""
+    rels = _read_rels(zf, 'ppt/presentation.xml')
+    names = []
+    with zf.open('ppt/presentation.xml') as f:
+        for _, elem in ElementTree.iterparse(f):
+            if elem.tag == _P + 'sldId':
+                target = rels.get(elem.get(_R + 'id'))
+                if target:
+                    names.append(posixpath.normpath(posixpath.join('ppt', target)))
+            elif elem.tag == _P + 'sldIdLst':
+                break
+    return names
+
+
+def _paragraph_text(p):
+    # Mirrors python-pptx's _Paragraph.text: runs and fields, with <a:br/> as "\v"
+    parts = []
+    for child in p:
+        if child.tag in (_A + 'r', _A + 'fld'):
+            t = child.find(_A + 't')
+            parts.append(t.text or '' if t is not None else '')
+        elif child.tag == _A + 'br':
+            parts.append('\v')
+    return ''.join(parts)
+
+
+def _text_body_text(tx_body):
+    return '\n'.join(_paragraph_text(p) for p in tx_body.iter(_A + 'p'))
+
+
+def _iter_slide_shapes(stream):
+    """
+    Streams a slide's XML, yielding each top-level shape of ``p:spTree`` once
+    its subtree is complete; the subtree is cleared afterwards so memory stays
+    bounded by the largest single shape.
+    """
+    depth = 0
+    for event, elem in ElementTree.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            continue
+        # <p:sld><p:cSld><p:spTree><shape> puts top-level shapes at depth 4
+        if depth == 4:
+            yield elem
+            elem.clear()
+        depth -= 1
+
+
+def extract_pptx(path, text_parts=None):
+    """
+    Single pass over the deck's slide XML, returning ``(ppt_info, retail_url)``
+    with the same results as ``extract_all_ppt_info`` and ``extract_retail_link``.
+    Stops reading slides once the header, link, revenue and rent are all found.
+    If ``text_parts`` is a list, the text of every slide read is appended to it.
+    """
+    results = _empty_ppt_info()
+    retail_url = None
+    with zipfile.ZipFile(path) as zf:
+        for index, slide_name in enumerate(_slide_part_names(zf)):
+            slide_rels = None
+            slide_text = []   # Shape and table-cell text, as scanned for financials
+            header_text = []  # Shape text only, as scanned for the header
+
+            with zf.open(slide_name) as f:
+                for shape in _iter_slide_shapes(f):
+                    if shape.tag == _P + 'sp':
+                        tx_body = shape.find(_P + 'txBody')
+                        text = _text_body_text(tx_body) if tx_body is not None else ''
+                        slide_text.append(text + ' ')
+                        header_text.append(text + '\n')
+
+                        if retail_url is None and tx_body is not None:
+                            for run in tx_body.iter(_A + 'r'):
+                                t = run.find(_A + 't')
+                                link = run.find(_A + 'rPr/' + _A + 'hlinkClick')
+                                if t is None or link is None or 'RetailIQ' not in (t.text or ''):
+                                    continue
+                                if slide_rels is None:
+                                    slide_rels = _read_rels(zf, slide_name)
+                                address = slide_rels.get(link.get(_R + 'id'))
+                                if address:
+                                    retail_url = address
+                                    break
+                    elif shape.tag == _P + 'graphicFrame':
+                        for cell in shape.iter(_A + 'tc'):
+                            tx_body = cell.find(_A + 'txBody')
+                            slide_text.append((_text_body_text(tx_body) if tx_body is not None else '') + ' ')
+
+            if index == 0:
+                _parse_header(''.join(header_text), results)
+            _parse_financials(''.join(slide_text), results)
+            if text_parts is not None:
+                text_parts.append(''.join(slide_text))
+
+            if retail_url and results['revenue'] != "N/A" and results['rent'] != "N/A":
+                break
+    return results, retail_url
+
+
+# --- Presentation dates from Drive folder names ---
+_MONTHS = {m: i for i, m in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+# Numbers and month names are delimited by "not another digit" / "not another
+# letter" rather than \b, so compact names such as "14Mar2025" still match, while
+# "Market" is not read as "Mar"
+_MONTH = (r'(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+          r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)(?![a-z])\.?')
+_DAY_MONTH_YEAR = re.compile(r'(?<!\d)(\d{1,2})(?:st|nd|rd|th)?[\s\-./,_]*' + _MONTH + r'[\s\-./,_]*(\d{4}|\d{2})(?!\d)',
+                             re.IGNORECASE)
+_MONTH_DAY_YEAR = re.compile(r'(?<![a-z])' + _MONTH + r'[\s\-./_]*(\d{1,2})(?:st|nd|rd|th)?,?[\s\-./_]+(\d{4})(?!\d)',
+                             re.IGNORECASE)
+_ISO_DATE = re.compile(r'(?<!\d)(\d{4})[\-./_](\d{1,2})[\-./_](\d{1,2})(?!\d)')
+# Anything else dateutil might reasonably read as a date; names without one of
+# these (e.g. "Market 5") used to be fuzzy-parsed into bogus dates.
+_DATE_HINT = re.compile(r'(?<!\d)(?:\d{4}|\d{8})(?!\d)|\d{1,4}[\-./]\d{1,2}[\-./]\d{2,4}|(?<![a-z])' + _MONTH,
+                        re.IGNORECASE)
+
+
+def _plausible(year, month, day):
+    if year < 100:
+        year += 2000
+    if not 2010 < year < 2030:
+        return None
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_folder_date(name):
+    """
+    Presentation date in a folder name, or ``None``. Common layouts ("25 Jan
+    2025", "January 25, 2025", "2025-01-25") are matched by precompiled
+    patterns; only other names that look date-like fall back to dateutil.
+    """
+    m = _DAY_MONTH_YEAR.search(name)
+    if m:
+        return _plausible(int(m.group(3)), _MONTHS[m.group(2).lower()[:3]], int(m.group(1)))
+    m = _MONTH_DAY_YEAR.search(name)
+    if m:
+        return _plausible(int(m.group(3)), _MONTHS[m.group(1).lower()[:3]], int(m.group(2)))
+    m = _ISO_DATE.search(name)
+    if m:
+        return _plausible(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+
+    if not _DATE_HINT.search(name):
+        return None
+    try:
+        parsed_date = dparser.parse(name, fuzzy=True).date()
+    except (ValueError, OverflowError):
+        return None
+    return parsed_date if 2010 < parsed_date.year < 2030 else None
+
+
+def get_property_id(url):
+    if not url: return None
+    try:
+        params = parse_qs(urlparse(url).query)
+        return params.get('property_id', [None])[0]
+    except:
+        return None
+
+
+def _search_text(text_parts):
+    text = ' '.join(' '.join(part.split()) for part in text_parts)
+    return text[:SLIDE_TEXT_MAX_CHARS] or None
+
+
+def parse_folder_files(pptx_path, pdf_path=None):
+    """CPU stage of the sync pipeline: everything derived from one folder's files."""
+    text_parts = []
+    try:
+        ppt_info, retail_url = extract_pptx(pptx_path, text_parts)
+    except Exception:
+        # Decks the streaming reader can't handle go through python-pptx
+        retail_url = extract_retail_link(pptx_path)
+        ppt_info = extract_all_ppt_info(pptx_path)
+
+    status, pdf_seconds = 'pending', None
+    if pdf_path:
+        start = time.perf_counter()
+        status = extract_status_from_pdf(pdf_path)
+        pdf_seconds = time.perf_counter() - start
+
+    return {
+        'property_id': get_property_id(retail_url),
+        'ppt_info': ppt_info,
+        'status': status,
+        'pdf_seconds': pdf_seconds,
+        'slide_text': _search_text(text_parts),
+    }
@@ -0,0 +1,39 @@
+"""
+Distinct zone/status values with record counts for the dashboard dropdowns.
+
+They only change when sync_drive writes or a record is edited, so they are
+computed once and kept in the shared cache until one of those invalidates them.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import PropertyRecord
+
+FACETS_CACHE_KEY = 'record-facets'
+FACET_FIELDS = {'zones': 'zone_name', 'statuses': 'status'}
+
+
+def _count_values(field):
+    rows = (
+        PropertyRecord.objects.exclude(**{f'{field}__isnull': True})
+        .values_list(field).annotate(count=Count('id')).order_by(field)
+    )
+    return list(rows)
+
+
+def compute_facets():
+    return {name: _count_values(field) for name, field in FACET_FIELDS.items()}
+
+
+def get_facets():
+    """Returns {'zones': [(zone, count), ...], 'statuses': [(status, count), ...]}."""
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        facets = compute_facets()
+        cache.set(FACETS_CACHE_KEY, facets, settings.FACET_CACHE_SECONDS)
+    return facets
+
+
+def invalidate_facets():
+    cache.delete(FACETS_CACHE_KEY)
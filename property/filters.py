@@ -0,0 +1,118 @@
+"""
+Query-string filtering and sorting shared by the dashboard and the mobile API,
+so both accept the same parameters and run entirely in SQL.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import F
+from django.utils.dateparse import parse_date
+
+from .search import match_expression, search_records
+
+# Query parameter -> ORM lookup on the numeric financial columns
+RANGE_FILTERS = {
+    'min_revenue': 'projected_revenue_value__gte',
+    'max_revenue': 'projected_revenue_value__lte',
+    'min_rent': 'total_rent_value__gte',
+    'max_rent': 'total_rent_value__lte',
+}
+
+DEFAULT_SORT = 'date'
+# Sort name -> (column, descending). Rows are always tie-broken by id in the same
+# direction with NULLs last, so every order is a valid keyset for pagination.py.
+SORT_KEYS = {
+    'date': ('presentation_date', True),
+    'revenue_desc': ('projected_revenue_value', True),
+    'revenue_asc': ('projected_revenue_value', False),
+    'rent_desc': ('total_rent_value', True),
+    'rent_asc': ('total_rent_value', False),
+    # bm25 score annotated by search_records; only valid while searching
+    'relevance': ('search_rank', False),
+}
+SORT_ORDERS = {
+    sort: (
+        F(column).desc(nulls_last=True) if descending else F(column).asc(nulls_last=True),
+        '-id' if descending else 'id',
+    )
+    for sort, (column, descending) in SORT_KEYS.items()
+}
+SORT_CHOICES = [
+    ('date', 'Newest first'),
+    ('revenue_desc', 'Revenue: high to low'),
+    ('revenue_asc', 'Revenue: low to high'),
+    ('rent_desc', 'Rent: high to low'),
+    ('rent_asc', 'Rent: low to high'),
+]
+
+
+def _decimal(value):
+    if not value:
+        return None
+    try:
+        number = Decimal(value.replace(',', ''))
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+
+def _date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def filter_records(queryset, params):
+    """Applies search/zone/status/date/revenue/rent filters from a QueryDict; bad values are ignored."""
+    sort = requested_sort(params)
+    queryset = search_records(queryset, params.get('q'), ranked=sort == 'relevance')
+
+    zone = params.get('zone')
+    if zone:
+        queryset = queryset.filter(zone_name=zone)
+
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    start_date = _date(params.get('start_date'))
+    end_date = _date(params.get('end_date'))
+    if start_date:
+        queryset = queryset.filter(presentation_date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(presentation_date__lte=end_date)
+
+    sort_column, _ = SORT_KEYS[sort]
+    for param, lookup in RANGE_FILTERS.items():
+        value = _decimal(params.get(param))
+        if value is None:
+            continue
+        column, _, comparison = lookup.partition('__')
+        if column != sort_column:
+            # Compared as "column + 0", which no index covers: SQLite then walks the sort
+            # order's index and checks the range row by row, stopping once a page is
+            # full, rather than range-scanning this column and sorting every match
+            alias = f'{column}_unindexed'
+            queryset = queryset.alias(**{alias: F(column) + 0})
+            lookup = f'{alias}__{comparison}'
+        queryset = queryset.filter(**{lookup: value})
+
+    return queryset
+
+
+def requested_sort(params):
+    """The sort for a request: best match first while searching unless another order was picked."""
+    searching = bool(match_expression(params.get('q')))
+    sort = params.get('sort') or ('relevance' if searching else DEFAULT_SORT)
+    if sort == 'relevance' and not searching:
+        return DEFAULT_SORT
+    return sort_key(sort)
+
+
+def sort_key(sort):
+    """Returns the validated sort name, falling back to the default for unknown values."""
+    return sort if sort in SORT_KEYS else DEFAULT_SORT
+
+
+def order_records(queryset, sort):
+    return queryset.order_by(*SORT_ORDERS[sort_key(sort)])
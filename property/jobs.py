@@ -0,0 +1,164 @@
+"""
+Locking, checkpointing and progress for sync_drive runs.
+
+A run claims the lock by being the only SyncJob in the RUNNING state with a
+recent heartbeat; a background thread keeps the heartbeat fresh, so a job whose
+process died is taken over once SYNC_JOB_STALE_SECONDS pass. Every folder a job
+finishes is checkpointed with the record it produced, and a run that follows a
+failed or interrupted one resumes it: checkpointed folders whose Drive
+fingerprint has not changed since are not downloaded or parsed again.
+"""
+import datetime
+import os
+import socket
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from .models import PropertyRecord, SyncCheckpoint, SyncJob
+
+
+class SyncAlreadyRunning(Exception):
+    def __init__(self, job):
+        super().__init__(f"Sync job #{job.pk} is already running ({job.owner}, since {job.started_at:%Y-%m-%d %H:%M})")
+        self.job = job
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def start_job(resume=True):
+    """
+    Claims the sync lock and returns the RUNNING job: the last failed or
+    interrupted one when ``resume`` is set, otherwise a new one.
+    Raises SyncAlreadyRunning if another live process holds the lock.
+    """
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.SYNC_JOB_STALE_SECONDS)
+    # Under the IMMEDIATE transaction mode this holds SQLite's write lock from
+    # the check to the claim, so two starting runs cannot both win
+    with transaction.atomic():
+        for running in SyncJob.objects.select_for_update().filter(status=SyncJob.RUNNING):
+            if running.heartbeat_at and running.heartbeat_at >= stale:
+                raise SyncAlreadyRunning(running)
+            running.status = SyncJob.INTERRUPTED
+            running.error = "No heartbeat; the process running it died."
+            running.save(update_fields=['status', 'error'])
+
+        last = SyncJob.objects.order_by('-id').first()
+        if resume and last is not None and last.status in (SyncJob.FAILED, SyncJob.INTERRUPTED):
+            job = last
+            job.status = SyncJob.RUNNING
+            job.attempts += 1
+            job.finished_at = job.error = None
+            job.save(update_fields=['status', 'attempts', 'finished_at', 'error'])
+        else:
+            job = SyncJob.objects.create()
+
+        job.owner = _owner()
+        job.phase = 'listing'
+        job.attempt_started_at = job.heartbeat_at = now
+        job.save(update_fields=['owner', 'phase', 'attempt_started_at', 'heartbeat_at'])
+    return job
+
+
+def finish_job(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    if status == SyncJob.SUCCEEDED:
+        job.checkpoints.all().delete()
+
+
+def update_job(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=[*fields, 'heartbeat_at'])
+
+
+@contextmanager
+def heartbeat(job):
+    """Keeps ``job.heartbeat_at`` fresh from a background thread while the body runs."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.SYNC_JOB_HEARTBEAT_SECONDS):
+                try:
+                    SyncJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now())
+                except OperationalError:
+                    pass  # Locked by the sync's own publish transaction; next beat
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'sync-job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield job
+    finally:
+        stop.set()
+        thread.join()
+
+
+# --- Checkpoints ---
+def save_checkpoint(job, record, fields, adopted_record_id=None):
+    """Stores ``fields`` of the record built for a folder, for a later attempt of ``job`` to reuse."""
+    values = {field: getattr(record, field) for field in fields}
+    SyncCheckpoint.objects.update_or_create(
+        job=job, folder_id=record.drive_folder_id,
+        defaults={'values': values, 'adopted_record_id': adopted_record_id})
+
+
+def load_checkpoints(job):
+    """Returns {folder ID: (unsaved PropertyRecord, adopted legacy record id)} for ``job``."""
+    restored = {}
+    for checkpoint in job.checkpoints.all():
+        values = {name: PropertyRecord._meta.get_field(name).to_python(value)
+                  for name, value in checkpoint.values.items()}
+        restored[checkpoint.folder_id] = (PropertyRecord(drive_folder_id=checkpoint.folder_id, **values),
+                                          checkpoint.adopted_record_id)
+    return restored
+
+
+# --- Progress ---
+def eta_seconds(job):
+    """Seconds left at the current attempt's pace, or None until it has finished a folder."""
+    if job.status != SyncJob.RUNNING or job.phase != 'processing' or not job.attempt_started_at:
+        return None
+    done = job.processed_folders + job.failed_folders - job.attempt_resumed_folders
+    if done <= 0:
+        return None
+    elapsed = (timezone.now() - job.attempt_started_at).total_seconds()
+    remaining = max(0, job.total_folders - job.processed_folders - job.failed_folders)
+    return round(elapsed / done * remaining)
+
+
+def job_progress(job):
+    """JSON-ready summary of a job for the dashboard."""
+    finished = job.processed_folders + job.failed_folders
+    return {
+        'id': job.pk,
+        'status': job.status,
+        'phase': job.phase,
+        'attempts': job.attempts,
+        'total_folders': job.total_folders,
+        'processed_folders': job.processed_folders,
+        'failed_folders': job.failed_folders,
+        'unchanged_folders': job.unchanged_folders,
+        'percent': round(100 * finished / job.total_folders) if job.total_folders else None,
+        'eta_seconds': eta_seconds(job),
+        'started_at': job.started_at,
+        'heartbeat_at': job.heartbeat_at,
+        'finished_at': job.finished_at,
+        'error': job.error,
+    }
+
+
+def latest_job():
+    return SyncJob.objects.order_by('-id').first()
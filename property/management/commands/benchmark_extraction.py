@@ -0,0 +1,50 @@
+import glob
+import os.path
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from property.extraction import extract_all_ppt_info, extract_pptx, extract_retail_link
+
+
+class Command(BaseCommand):
+    help = "Compares PPTX extraction throughput: python-pptx (two passes) vs the streaming extractor."
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['downloads'],
+                            help="PPTX files or directories containing them (default: downloads/).")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed passes over the whole set.")
+
+    def handle(self, *args, **options):
+        decks = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                decks.extend(sorted(glob.glob(os.path.join(path, '*.pptx'))))
+            elif os.path.isfile(path):
+                decks.append(path)
+        if not decks:
+            raise CommandError("No .pptx files found.")
+
+        def legacy(path):
+            return extract_all_ppt_info(path), extract_retail_link(path)
+
+        # Both paths must agree before their speed is worth comparing
+        mismatches = [path for path in decks if legacy(path) != extract_pptx(path)]
+        for path in mismatches:
+            self.stdout.write(self.style.WARNING(f"Mismatch: {path}"))
+
+        timings = {}
+        for label, extractor in (('python-pptx', legacy), ('streaming', extract_pptx)):
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                for path in decks:
+                    extractor(path)
+            elapsed = time.perf_counter() - start
+            timings[label] = elapsed
+            parsed = len(decks) * options['repeat']
+            self.stdout.write(f"{label:>12}: {parsed / elapsed:8.1f} decks/s  "
+                              f"({elapsed / parsed * 1000:.2f} ms/deck)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {timings['python-pptx'] / timings['streaming']:.1f}x over {len(decks)} decks, "
+            f"{len(mismatches)} mismatches"))
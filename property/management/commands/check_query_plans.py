@@ -0,0 +1,155 @@
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from property.filters import requested_sort
+from property.management.commands.load_test_sqlite import TEST_CACHES
+from property.models import PropertyRecord
+from property.pagination import encode_cursor
+from property.views import PropertyDashboardView, PropertyRecordListAPIView
+
+TABLE = PropertyRecord._meta.db_table
+
+# Query strings exercising every filter/sort shape the dashboard and API accept
+SCENARIOS = [
+    '',
+    'zone=Zone 3',
+    'status=Approved',
+    'zone=Zone 3&status=Approved',
+    'start_date=2025-03-01&end_date=2025-06-30',
+    'zone=Zone 3&start_date=2025-03-01',
+    'status=Hold&end_date=2025-06-30',
+    'zone=Zone 3&status=Approved&start_date=2025-03-01&end_date=2025-06-30',
+    'min_revenue=10&max_revenue=20',
+    'min_rent=50000',
+    'sort=revenue_desc',
+    'sort=rent_desc',
+    'page_size=50',
+    'q=market',
+    'q=market&zone=Zone 3&sort=date',
+    f'cursor={encode_cursor(datetime.date(2025, 6, 1), 50_000)}',
+    f'zone=Zone 3&cursor={encode_cursor(datetime.date(2025, 6, 1), 50_000)}',
+    f'cursor={encode_cursor(None, 50_000)}',
+    f"sort=revenue_asc&cursor={encode_cursor(Decimal('20.00'), 50_000)}",
+    f'before={encode_cursor(datetime.date(2025, 6, 1), 50_000)}',
+    f'zone=Zone 3&before={encode_cursor(datetime.date(2025, 6, 1), 50_000)}',
+    f'before={encode_cursor(None, 50_000)}',
+    f"sort=rent_desc&before={encode_cursor(Decimal('200000.00'), 50_000)}",
+]
+
+STATUSES = ['Approved', 'Conditionally Approved', 'Dropped/Rejected', 'Hold', 'pending']
+
+
+def plan_problems(plan, sort):
+    """
+    Lines of an EXPLAIN QUERY PLAN that mean the query does not scale: a full
+    scan of the record table, or a sort of the rows it matched (which reads
+    all of them before the first page can be returned). Ordering search hits
+    by relevance sorts them by their bm25 rank, which has no index, so that
+    sort is the one allowed.
+    """
+    return [line for line in plan
+            if (line.startswith(f'SCAN {TABLE}') and 'INDEX' not in line)
+            or ('USE TEMP B-TREE FOR ORDER BY' in line and sort != 'relevance')]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Loads a synthetic PropertyRecord table (rolled back afterwards) and asserts that every "
+            "dashboard and API query is answered from an index, in index order.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Query plans are only checked on SQLite.")
+
+        # Counts and pages computed from the synthetic rows must not reach the real cache
+        try:
+            with override_settings(CACHES=TEST_CACHES), transaction.atomic():
+                self.load_rows(options['rows'])
+                failures = self.check_plans(options['verbosity'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"{failures} queries scan the table or sort their matches.")
+        self.stdout.write(self.style.SUCCESS("Every dashboard and API query is served from an index, in order."))
+
+    def load_rows(self, count):
+        started = time.perf_counter()
+        rng = random.Random(42)
+        first_day = datetime.date(2025, 1, 1)
+        batch = []
+        for i in range(count):
+            batch.append(PropertyRecord(
+                drive_folder_id=f'synthetic-{i}',
+                presentation_date=None if i % 50 == 0 else first_day + datetime.timedelta(days=rng.randrange(540)),
+                zone_name=f'Zone {rng.randrange(12)}',
+                status=rng.choice(STATUSES),
+                final_market_name=f'Market {i}',
+                projected_revenue_value=None if i % 10 == 0 else Decimal(rng.randrange(100, 5000)) / 100,
+                total_rent_value=None if i % 10 == 0 else Decimal(rng.randrange(10_000, 500_000)),
+            ))
+            if len(batch) == 5000:
+                PropertyRecord.objects.bulk_create(batch)
+                batch = []
+        PropertyRecord.objects.bulk_create(batch)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f"Loaded {count} synthetic rows in {time.perf_counter() - started:.1f}s")
+
+    def check_plans(self, verbosity):
+        factory = RequestFactory()
+        user = User(username='query-plan-check', is_staff=True)
+        views = {
+            'dashboard': PropertyDashboardView.as_view(),
+            'api': lambda request: PropertyRecordListAPIView.as_view()(request).render(),
+        }
+
+        failures = checked = 0
+        for label, view in views.items():
+            for scenario in SCENARIOS:
+                request = factory.get('/', data=dict(p.split('=') for p in scenario.split('&') if p))
+                request.user = user
+                statements = []
+
+                def capture(execute, sql, params, many, context):
+                    statements.append((sql, params))
+                    return execute(sql, params, many, context)
+
+                with connection.execute_wrapper(capture):
+                    view(request)
+
+                for sql, params in statements:
+                    if TABLE not in sql:
+                        continue
+                    plan = self.explain(sql, params)
+                    failed = bool(plan_problems(plan, requested_sort(request.GET)))
+                    failures += failed
+                    if failed or verbosity >= 2:
+                        style = self.style.ERROR if failed else self.style.SUCCESS
+                        self.stdout.write(style(f"[{label}] ?{scenario or '(no filters)'}: {sql[:100]}"))
+                        for line in plan:
+                            self.stdout.write(f"    {line}")
+                    checked += 1
+        self.stdout.write(f"Checked {checked} queries across {len(SCENARIOS)} filter/sort scenarios")
+        return failures
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
@@ -0,0 +1,195 @@
+import datetime
+import io
+import os.path
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from property.management.commands.sync_drive import Command as SyncCommand
+from property.models import PropertyRecord
+from property.views import PropertyDashboardView, edit_record
+
+STATUSES = ['Approved', 'Conditionally Approved', 'Dropped/Rejected', 'Hold', 'pending']
+SORTS = ['', 'date', 'revenue_desc', 'rent_asc']
+# Isolated from the real cache, so facets and pages computed from the copy never leak out
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'load-test'},
+    'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'load-test-pages'},
+    'rows': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'load-test-rows'},
+}
+
+
+class Command(BaseCommand):
+    help = ("Runs sync_drive's publish step in a loop against parallel dashboard readers and remark "
+            "writers, on a copy of the database, and reports latency percentiles for each.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=30, help="Seconds to run for.")
+        parser.add_argument('--readers', type=int, default=8, help="Threads rendering the dashboard.")
+        parser.add_argument('--writers', type=int, default=2, help="Threads posting remark edits.")
+        parser.add_argument('--sync-interval', type=float, default=2, help="Pause between simulated syncs.")
+        parser.add_argument('--changed', type=float, default=0.1,
+                            help="Share of records each simulated sync rewrites (1 = every folder changed).")
+        parser.add_argument('--rows', type=int, default=5000,
+                            help="Synthetic records are added to the copy until it has this many.")
+        parser.add_argument('--baseline', action='store_true',
+                            help="Run with SQLite's defaults (rollback journal, no OPTIONS, no persistent "
+                                 "connections) instead of the configured profile, for comparison.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The load test targets the SQLite profile.")
+
+        workdir = tempfile.mkdtemp(prefix='property-load-test-')
+        try:
+            self.use_copy(os.path.join(workdir, 'db.sqlite3'), options['baseline'])
+            with override_settings(CACHES=TEST_CACHES):
+                self.seed(options['rows'])
+                self.report_profile()
+                results = self.run(options)
+        finally:
+            connection.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+        self.report(results, options['duration'])
+
+    def use_copy(self, path, baseline):
+        source, target = sqlite3.connect(connection.settings_dict['NAME']), sqlite3.connect(path)
+        source.backup(target)
+        source.close()
+        if baseline:
+            target.execute('PRAGMA journal_mode=DELETE')
+        target.close()
+
+        # Connections opened from here on (one per worker thread) use the copy
+        connection.close()
+        connection.settings_dict['NAME'] = path
+        if baseline:
+            connection.settings_dict.update(OPTIONS={}, CONN_MAX_AGE=0)
+
+    def seed(self, rows):
+        existing = PropertyRecord.objects.count()
+        rng = random.Random(7)
+        first_day = datetime.date(2025, 1, 1)
+        PropertyRecord.objects.bulk_create([
+            PropertyRecord(
+                drive_folder_id=f'load-test-{i}',
+                presentation_date=first_day + datetime.timedelta(days=rng.randrange(540)),
+                zone_name=f'Zone {rng.randrange(12)}',
+                circle=f'Circle {rng.randrange(40)}',
+                hub=f'Hub {rng.randrange(120)}',
+                status=rng.choice(STATUSES),
+                final_market_name=f'Market {i}',
+                projected_revenue_value=Decimal(rng.randrange(100, 5000)) / 100,
+                total_rent_value=Decimal(rng.randrange(10_000, 500_000)),
+            )
+            for i in range(existing, rows)
+        ], batch_size=1000)
+        self.stdout.write(f"Database copy holds {max(existing, rows)} records")
+
+    def report_profile(self):
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+                pragmas[pragma] = cursor.fetchone()[0]
+        pragmas['transaction_mode'] = connection.transaction_mode or 'DEFERRED'
+        pragmas['CONN_MAX_AGE'] = connection.settings_dict['CONN_MAX_AGE']
+        self.stdout.write("Profile: " + ", ".join(f"{name}={value}" for name, value in pragmas.items()))
+
+    def run(self, options):
+        factory = RequestFactory()
+        user = User(username='load-test', is_staff=True)
+        record_ids = list(PropertyRecord.objects.values_list('id', flat=True))
+        zones = list(PropertyRecord.objects.values_list('zone_name', flat=True).distinct()) + ['']
+
+        def read(rng):
+            params = {'zone': rng.choice(zones), 'status': rng.choice(STATUSES + ['']), 'sort': rng.choice(SORTS)}
+            request = factory.get('/dashboard/', {name: value for name, value in params.items() if value})
+            request.user = user
+            PropertyDashboardView.as_view()(request)
+
+        def write(rng):
+            request = factory.post('/records/edit/', {'remarks': f"Load test remark {rng.random():.6f}"})
+            request.user = user
+            edit_record(request, rng.choice(record_ids))
+
+        def sync(rng):
+            records = []
+            for record in PropertyRecord.objects.exclude(drive_folder_id=None).iterator():
+                if rng.random() >= options['changed']:
+                    continue
+                record.pk = None
+                record.status = rng.choice(STATUSES)
+                record.source_fingerprint = f'{rng.getrandbits(64):016x}'
+                records.append(record)
+            SyncCommand(stdout=io.StringIO()).publish(records, {}, [])
+
+        # (label, operation, seed, pause after each run)
+        workers = [('sync', sync, 0, options['sync_interval'])]
+        workers += [('dashboard read', read, i, 0) for i in range(options['readers'])]
+        workers += [('remarks write', write, i, 0) for i in range(options['writers'])]
+
+        results = {kind: {'latencies': [], 'errors': {}} for kind, *_ in workers}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+        threads = [threading.Thread(target=self.worker, args=(kind, operation, seed, pause, deadline, results[kind], lock))
+                   for kind, operation, seed, pause in workers]
+        self.stdout.write(f"Running {len(threads)} threads for {options['duration']:.0f}s...")
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def worker(self, kind, operation, seed, pause, deadline, result, lock):
+        rng = random.Random(f'{kind}-{seed}')
+        latencies, errors = [], {}
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation(rng)
+                except OperationalError as e:
+                    errors[str(e)] = errors.get(str(e), 0) + 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+                time.sleep(pause)
+        finally:
+            connection.close()
+        with lock:
+            result['latencies'].extend(latencies)
+            for message, count in errors.items():
+                result['errors'][message] = result['errors'].get(message, 0) + count
+
+    def report(self, results, duration):
+        self.stdout.write(f"{'operation':<16}{'ops':>7}{'ops/s':>8}{'errors':>8}"
+                          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        failed = False
+        for kind, result in results.items():
+            latencies = sorted(result['latencies'])
+            errors = sum(result['errors'].values())
+            failed = failed or errors
+
+            def percentile(q):
+                return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0
+
+            self.stdout.write(f"{kind:<16}{len(latencies):>7}{len(latencies) / duration:>8.1f}{errors:>8}"
+                              f"{percentile(0.50):>9.1f}{percentile(0.95):>9.1f}{percentile(0.99):>9.1f}"
+                              f"{percentile(1.0):>9.1f}")
+            for message, count in result['errors'].items():
+                self.stdout.write(self.style.ERROR(f"    {count} x {message}"))
+
+        if failed:
+            self.stdout.write(self.style.ERROR("Some operations failed under concurrent load."))
+        else:
+            self.stdout.write(self.style.SUCCESS("No operation failed under concurrent load."))
@@ -1,27 +1,41 @@
 import os.path
-import io
-import re
-from urllib.parse import urlparse, parse_qs
-from datetime import datetime
-import dateutil.parser as dparser
-
-# Lightweight libraries
-from pptx import Presentation
-from pdfminer.high_level import extract_text
-from pptx.enum.shapes import MSO_SHAPE_TYPE
+import hashlib
+import json
+import multiprocessing
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed, wait)
 
 # Django imports
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 
 # Local models
-from property.models import PropertyRecord
-
-SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+from property.drive import SCOPES, DownloadStore, DriveClient
+from property.analytics import rebuild_summary
+from property.delta import purge_tombstones
+from property.extraction import parse_folder_date, parse_folder_files
+from property.facets import invalidate_facets
+from property.jobs import (SyncAlreadyRunning, finish_job, heartbeat, load_checkpoints, save_checkpoint,
+                           start_job, update_job)
+from property.models import PropertyRecord, SyncJob
+from property.thumbnails import get_thumbnail_cache
+from property.versioning import bump_data_version
+
+# Columns owned by sync_drive; everything else (e.g. remarks) belongs to users, and
+# so does status once someone has set it by hand (status_edited_at)
+SYNCED_FIELDS = [
+    'source_fingerprint', 'property_id', 'presentation_date', 'circle', 'hub', 'hub_rank',
+    'city', 'city_rank', 'final_market_name', 'zone_name', 'ppt_link', 'ai_summary_link',
+    'recording_link', 'first_slide_image_url', 'status', 'projected_revenue_lakhs',
+    'total_rent_maintenance', 'projected_revenue_value', 'total_rent_value', 'slide_text',
+]
+WRITE_BATCH_SIZE = 500
 
 
 class Command(BaseCommand):
@@ -29,27 +43,79 @@ class Command(BaseCommand):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.folder_cache = {}  # To avoid hitting Drive API for the same parent multiple times
+        self.folder_cache = {}  # Folder ID -> {'name', 'parents'}, seeded from the listing
+        self.date_cache = {}  # Folder ID -> presentation date resolved for it
+
+    def add_arguments(self, parser):
+        parser.add_argument('--thumbnail-workers', type=int, default=8,
+                            help="Parallel downloads used to pre-warm slide thumbnails.")
+        parser.add_argument('--full', action='store_true',
+                            help="Re-download and re-parse every folder, even if unchanged on Drive.")
+        parser.add_argument('--io-workers', type=int, default=8,
+                            help="Threads downloading folder contents from Drive.")
+        parser.add_argument('--cpu-workers', type=int, default=0,
+                            help="Processes parsing PPTX/PDF files (default: one per CPU).")
+        parser.add_argument('--restart', action='store_true',
+                            help="Start a new job instead of resuming an interrupted or failed one.")
+        parser.add_argument('--every', type=float, metavar='MINUTES',
+                            help="Keep running, starting a sync every MINUTES (start to start). A sync "
+                                 "that overruns delays the next one rather than overlapping it.")
 
     def handle(self, *args, **options):
-        # 1. Google Drive Authentication
-        creds = None
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file('bdstorage_credentials.json', SCOPES)
-                creds = flow.run_local_server(port=0)
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
+        if options['every']:
+            self.run_schedule(options)
+        else:
+            self.run_job(options)
 
-        service = build('drive', 'v3', credentials=creds)
+    def run_schedule(self, options):
+        interval = options['every'] * 60
+        while True:
+            started = time.monotonic()
+            try:
+                self.run_job(options)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Sync failed: {e}"))
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+    def run_job(self, options):
+        # The job is the lock: a sync started by cron or another scheduler while
+        # this one runs finds it and exits
+        try:
+            job = start_job(resume=not options['restart'])
+        except SyncAlreadyRunning as e:
+            self.stdout.write(self.style.WARNING(f"{e}; skipping this run."))
+            return
+        if job.attempts > 1:
+            self.stdout.write(f"Resuming sync job #{job.pk} (attempt {job.attempts})")
+
+        with heartbeat(job):
+            try:
+                self.sync(job, options)
+            except (KeyboardInterrupt, SystemExit):
+                finish_job(job, SyncJob.INTERRUPTED, "Stopped before finishing.")
+                raise
+            except Exception as e:
+                finish_job(job, SyncJob.FAILED, f"{type(e).__name__}: {e}")
+                raise
+        finish_job(job, SyncJob.SUCCEEDED)
+
+    def sync(self, job, options):
+        self.folder_cache = {}
+        self.date_cache = {}
 
-        # 2. Database Cleanup
-        self.stdout.write(self.style.WARNING("Wiping PropertyRecord table for fresh sync..."))
-        PropertyRecord.objects.all().delete()
+        # 1. Google Drive Authentication
+        drive = DriveClient(self.authenticate())
+        service = drive.service
+
+        # 2. Existing records, keyed by Drive folder ID
+        existing = {
+            folder_id: (pk, fingerprint)
+            for pk, folder_id, fingerprint in PropertyRecord.objects.filter(drive_folder_id__isnull=False)
+            .values_list('pk', 'drive_folder_id', 'source_fingerprint')
+        }
+        # Rows synced before folder IDs were tracked are adopted by their PPT link
+        legacy = dict(PropertyRecord.objects.filter(drive_folder_id__isnull=True)
+                      .exclude(ppt_link__isnull=True).values_list('ppt_link', 'pk'))
 
         # 3. Fetch Items
         q = (
@@ -68,13 +134,16 @@ class Command(BaseCommand):
         folder_data = {}
         for item in all_items:
             if item['mimeType'] == 'application/vnd.google-apps.folder':
+                self.folder_cache[item['id']] = {'name': item['name'], 'parents': item.get('parents', [])}
                 folder_data[item['id']] = {
                     'name': item['name'],
                     'id': item['id'],
                     'parents': item.get('parents', []),
-                    'ppt_id': None, 'ppt_link': None,
-                    'pdf_id': None, 'pdf_link': None,
-                    'mp4_link': None, 'thumb_link': None
+                    'ppt_id': None, 'ppt_link': None, 'ppt_meta': None,
+                    'pdf_id': None, 'pdf_link': None, 'pdf_meta': None,
+                    'mp4_link': None, 'thumb_link': None,
+                    'ppt_modified': None, 'ppt_md5': None,
+                    'pdf_modified': None, 'pdf_md5': None
                 }
 
         for item in all_items:
@@ -85,199 +154,330 @@ class Command(BaseCommand):
 
             if 'presentation' in item.get('mimeType', '') or 'powerpoint' in item.get('mimeType', ''):
                 folder_data[p_id]['ppt_id'] = item['id']
+                folder_data[p_id]['ppt_meta'] = item
                 folder_data[p_id]['ppt_link'] = item.get('webViewLink')
+                folder_data[p_id]['ppt_modified'] = item.get('modifiedTime')
+                folder_data[p_id]['ppt_md5'] = item.get('md5Checksum')
                 t_link = item.get('thumbnailLink')
                 if t_link:
                     folder_data[p_id]['thumb_link'] = t_link.replace('=s220', '=s1000')
             elif 'ai_summary' in name and name.endswith('.pdf'):
                 folder_data[p_id]['pdf_id'] = item['id']
+                folder_data[p_id]['pdf_meta'] = item
                 folder_data[p_id]['pdf_link'] = item.get('webViewLink')
+                folder_data[p_id]['pdf_modified'] = item.get('modifiedTime')
+                folder_data[p_id]['pdf_md5'] = item.get('md5Checksum')
             elif name == 'recording.mp4':
                 folder_data[p_id]['mp4_link'] = item.get('webViewLink')
 
         # 5. Extraction and Save
-        if not os.path.exists('downloads'): os.makedirs('downloads')
-        count = 0
+        self.download_store = DownloadStore(settings.DRIVE_DOWNLOAD_DIR, settings.DRIVE_DOWNLOAD_MAX_BYTES)
+        count = unchanged = resumed = 0
+        seen_ids = set()
+        pending = []
+        records = []
+        adopted = {}  # Legacy row pk -> folder ID it now belongs to
+        checkpoints = load_checkpoints(job)
+
+        # Presentation dates come from ancestor folder names, resolved in bulk up front.
+        # They are part of the fingerprint, so renaming a dated folder re-syncs its markets.
+        deck_folders = [f_id for f_id, data in folder_data.items() if data['ppt_id']]
+        self.resolve_ancestors(drive, deck_folders)
+        for f_id in deck_folders:
+            folder_data[f_id]['presentation_date'] = self.find_date_in_parents(f_id)
 
         for f_id, data in folder_data.items():
             # REMOVED strict condition: Now processes folder if at least PPT is found
             if data['ppt_id']:
-                visual_slash_name = data['name'].replace('/', '∕')
-                local_pptx = os.path.join('downloads', f"{visual_slash_name}.pptx")
-
-                try:
-                    self.stdout.write(f"Syncing: {data['name']}")
-                    presentation_date = self.find_date_in_parents(service, f_id)
-
-                    # Process PPT
-                    self.download_file(service, data['ppt_id'], local_pptx)
-                    retail_url = self.extract_retail_link(local_pptx)
-                    prop_id = self.get_property_id(retail_url)
-
+                seen_ids.add(f_id)
+                fingerprint = self.folder_fingerprint(data)
+                if f_id in existing:
+                    record_pk, stored_fingerprint = existing[f_id]
+                else:
+                    record_pk, stored_fingerprint = legacy.pop(data['ppt_link'], None), None
+                if not options['full'] and record_pk and stored_fingerprint == fingerprint:
+                    unchanged += 1
+                    continue
+                # Parsed by an earlier attempt of this job, and unchanged on Drive since
+                if f_id in checkpoints and checkpoints[f_id][0].source_fingerprint == fingerprint:
+                    record, adopted_pk = checkpoints[f_id]
+                    records.append(record)
+                    if adopted_pk:
+                        adopted[adopted_pk] = f_id
+                    resumed += 1
+                    continue
+                pending.append((f_id, data, record_pk, fingerprint))
+        if resumed:
+            self.stdout.write(f"Resumed {resumed} folders from checkpoints")
+
+        # Drive I/O runs on a thread pool and python-pptx/pdfminer parsing on a
+        # process pool. At most `max_in_flight` folders are between stages at
+        # once, so downloads can't run arbitrarily far ahead of parsing. Parse workers
+        # are spawned, not forked: the heartbeat thread (and the I/O pool, as workers
+        # are started on demand) is already running, and a forked child could inherit
+        # a lock one of those threads held at the time.
+        io_workers = max(1, options['io_workers'])
+        cpu_workers = max(1, options['cpu_workers'] or os.cpu_count() or 1)
+        max_in_flight = io_workers + 2 * cpu_workers
+        queue = iter(pending)
+        in_flight = {}
+        pdf_timings = []
+        update_job(job, phase='processing', total_folders=len(pending) + resumed, processed_folders=resumed,
+                   failed_folders=0, unchanged_folders=unchanged, attempt_resumed_folders=resumed,
+                   attempt_started_at=timezone.now())
+
+        with ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=cpu_workers,
+                                    mp_context=multiprocessing.get_context('spawn')) as cpu_pool:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    item = next(queue, None)
+                    if item is None: break
+                    self.stdout.write(f"Syncing: {item[1]['name']}")
+                    in_flight[io_pool.submit(self.fetch_folder, drive, item[0], item[1])] = ('io', item, None)
+                if not in_flight: break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, item, fetched = in_flight.pop(future)
+                    f_id, data, record_pk, fingerprint = item
                     try:
-                        ppt_info = self.extract_all_ppt_info(local_pptx)
-                    except Exception:
-                        ppt_info = {}
-
-                    # Process PDF (Summary) optionally
-                    extracted_status = 'pending'
-                    if data['pdf_id']:
-                        local_pdf = os.path.join('downloads', f"{visual_slash_name}_sum.pdf")
-                        self.download_file(service, data['pdf_id'], local_pdf)
-                        extracted_status = self.extract_status_from_pdf(local_pdf)
-
-                    PropertyRecord.objects.create(
-                        property_id=prop_id,
-                        presentation_date=presentation_date,
-                        circle=ppt_info.get('circle'),
-                        hub=ppt_info.get('hub'),
-                        hub_rank=ppt_info.get('hub_rank'),
-                        city=ppt_info.get('city'),
-                        city_rank=ppt_info.get('city_rank'),
-                        final_market_name=ppt_info.get('final_market_name') or data['name'],
-                        zone_name=ppt_info.get('zone_name'),
-                        ppt_link=data.get('ppt_link'),
-                        ai_summary_link=data.get('pdf_link'),
-                        recording_link=data.get('mp4_link'),
-                        first_slide_image_url=data.get('thumb_link'),
-                        status=extracted_status,
-                        projected_revenue_lakhs=ppt_info.get('revenue', 'N/A'),
-                        total_rent_maintenance=ppt_info.get('rent', 'N/A')
-                    )
-
-                    self.stdout.write(self.style.SUCCESS(f"  -> Saved {data['name']} (Date: {presentation_date})"))
-                    count += 1
+                        if stage == 'io':
+                            fetched = future.result()
+                            parse = cpu_pool.submit(parse_folder_files, fetched['pptx_path'], fetched['pdf_path'])
+                            in_flight[parse] = ('cpu', item, fetched)
+                            continue
+
+                        parsed = future.result()
+                        record = self.build_record(f_id, data, fingerprint, parsed)
+                        records.append(record)
+                        adopted_pk = record_pk if record_pk and f_id not in existing else None
+                        if adopted_pk:
+                            adopted[adopted_pk] = f_id
+                        save_checkpoint(job, record, SYNCED_FIELDS, adopted_pk)
+                        update_job(job, processed_folders=job.processed_folders + 1)
+                        self.stdout.write(self.style.SUCCESS(
+                            f"  -> Saved {data['name']} (Date: {data['presentation_date']})"))
+                        if parsed['pdf_seconds'] is not None:
+                            pdf_timings.append(parsed['pdf_seconds'])
+                            if options['verbosity'] >= 2:
+                                self.stdout.write(f"     PDF status parsed in {parsed['pdf_seconds'] * 1000:.0f} ms")
+                        count += 1
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"  -> Error on {data['name']}: {e}"))
+                        update_job(job, failed_folders=job.failed_folders + 1)
+
+        store = self.download_store
+        self.stdout.write(
+            f"Downloads: {store.hits} served locally, {store.downloads} fetched "
+            f"({store.bytes_downloaded / 1024 / 1024:.1f} MB)")
+        if pdf_timings:
+            self.stdout.write(
+                f"PDF status parsing: {len(pdf_timings)} files, "
+                f"avg {sum(pdf_timings) / len(pdf_timings) * 1000:.0f} ms, max {max(pdf_timings) * 1000:.0f} ms")
+
+        # 6. Publish everything in one transaction, so readers see either the
+        # previous sync or this one, never a mix
+        update_job(job, phase='publishing')
+        started = time.perf_counter()
+        vanished = [pk for f_id, (pk, _) in existing.items() if f_id not in seen_ids]
+        removed = self.publish(records, adopted, vanished + list(legacy.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Sync complete: {count} saved, {resumed} resumed, {unchanged} unchanged, {removed} removed "
+            f"(published in {(time.perf_counter() - started) * 1000:.0f} ms)"))
+
+        # 7. Pre-warm slide previews so the dashboard never waits on Drive
+        update_job(job, phase='thumbnails')
+        self.warm_thumbnails(drive, folder_data, options['thumbnail_workers'])
+
+    def authenticate(self):
+        creds = None
+        if os.path.exists('token.json'):
+            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file('bdstorage_credentials.json', SCOPES)
+                creds = flow.run_local_server(port=0)
+            with open('token.json', 'w') as token:
+                token.write(creds.to_json())
+        return creds
+
+    def fetch_folder(self, drive, f_id, data):
+        """I/O stage of the sync pipeline; runs on a worker thread."""
+        local_pptx = self.download_store.fetch(drive, data['ppt_meta'], '.pptx')
+        local_pdf = self.download_store.fetch(drive, data['pdf_meta'], '.pdf') if data['pdf_id'] else None
+        return {'pptx_path': local_pptx, 'pdf_path': local_pdf}
+
+    def build_record(self, f_id, data, fingerprint, parsed):
+        ppt_info = parsed['ppt_info']
+        return PropertyRecord(
+            drive_folder_id=f_id,
+            source_fingerprint=fingerprint,
+            property_id=parsed['property_id'],
+            presentation_date=data['presentation_date'],
+            circle=ppt_info.get('circle'),
+            hub=ppt_info.get('hub'),
+            hub_rank=ppt_info.get('hub_rank'),
+            city=ppt_info.get('city'),
+            city_rank=ppt_info.get('city_rank'),
+            final_market_name=ppt_info.get('final_market_name') or data['name'],
+            zone_name=ppt_info.get('zone_name'),
+            ppt_link=data.get('ppt_link'),
+            ai_summary_link=data.get('pdf_link'),
+            recording_link=data.get('mp4_link'),
+            first_slide_image_url=data.get('thumb_link'),
+            status=parsed['status'],
+            projected_revenue_lakhs=ppt_info.get('revenue', 'N/A'),
+            total_rent_maintenance=ppt_info.get('rent', 'N/A'),
+            projected_revenue_value=ppt_info.get('revenue_value'),
+            total_rent_value=ppt_info.get('rent_value'),
+            slide_text=parsed['slide_text'],
+        )
 
+    def publish(self, records, adopted, removed_pks):
+        """Writes the sync's results and refreshes everything derived from the table; returns the number deleted."""
+        removed = self.write_records(records, adopted, removed_pks)
+        # bulk_create/update skip model signals, so drop the dropdown facets here...
+        invalidate_facets()
+        purge_tombstones()
+
+        # ...and rebuild the analytics summary from scratch for the same reason
+        started = time.perf_counter()
+        groups = rebuild_summary()
+        self.stdout.write(f"Analytics summary: {groups} groups rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms")
+        # Retires every cached dashboard page, now that facets and summary are current
+        bump_data_version()
+        return removed
+
+    @transaction.atomic
+    def write_records(self, records, adopted, removed_pks):
+        """Upserts synced records and deletes vanished ones; returns the number deleted."""
+        # Legacy rows take their folder ID first, so the upsert below updates
+        # them in place instead of inserting duplicates
+        for pk, f_id in adopted.items():
+            PropertyRecord.objects.filter(pk=pk).update(drive_folder_id=f_id)
+
+        # Upsert keyed on the folder ID; remarks and created_at are left alone, and
+        # so is a status someone picked in the dashboard
+        edited = set(
+            PropertyRecord.objects.filter(drive_folder_id__in=[record.drive_folder_id for record in records],
+                                          status_edited_at__isnull=False)
+            .values_list('drive_folder_id', flat=True)
+        )
+        for batch, fields in (
+            ([record for record in records if record.drive_folder_id not in edited], SYNCED_FIELDS),
+            ([record for record in records if record.drive_folder_id in edited],
+             [field for field in SYNCED_FIELDS if field != 'status']),
+        ):
+            PropertyRecord.objects.bulk_create(
+                batch, batch_size=WRITE_BATCH_SIZE, update_conflicts=True,
+                unique_fields=['drive_folder_id'], update_fields=fields + ['updated_at'])
+
+        removed = 0
+        for start in range(0, len(removed_pks), WRITE_BATCH_SIZE):
+            removed += PropertyRecord.objects.filter(pk__in=removed_pks[start:start + WRITE_BATCH_SIZE]).delete()[0]
+        return removed
+
+    def folder_fingerprint(self, data):
+        # Anything that feeds a PropertyRecord field, including the date read from an
+        # ancestor's name; Drive's thumbnailLink is re-signed on every listing so it
+        # is deliberately left out.
+        keys = ('name', 'parents', 'presentation_date', 'ppt_id', 'ppt_link', 'ppt_modified', 'ppt_md5',
+                'pdf_id', 'pdf_link', 'pdf_modified', 'pdf_md5', 'mp4_link')
+        payload = json.dumps([data[k] for k in keys], default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def warm_thumbnails(self, drive, folder_data, workers):
+        thumbnail_cache = get_thumbnail_cache()
+        candidates = [data for data in folder_data.values() if data['ppt_id'] and data['thumb_link']]
+        # Unchanged decks keep their stored preview, tagged with the deck's modifiedTime
+        stale = [data for data in candidates
+                 if not data['ppt_modified'] or thumbnail_cache.get_version(data['ppt_id']) != data['ppt_modified']]
+
+        def warm(data):
+            thumbnail_cache.set(data['ppt_id'], drive.fetch(data['thumb_link']), version=data['ppt_modified'])
+
+        warmed = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(warm, data): data for data in stale}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    warmed += 1
                 except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"  -> Error on {data['name']}: {e}"))
-
-    def find_date_in_parents(self, service, folder_id):
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"  -> Preview failed for {futures[future]['name']}: {e}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Slide previews: {warmed} fetched, {len(candidates) - len(stale)} unchanged, {failed} failed"))
+
+    def resolve_ancestors(self, drive, folder_ids):
+        """
+        Fills ``folder_cache`` with every ancestor the date lookup will visit.
+        Folders already in the listing cost nothing; the rest are fetched level
+        by level in batches of up to 100 requests.
+        """
+        while True:
+            missing = set()
+            for folder_id in folder_ids:
+                current_id = folder_id
+                while current_id and current_id not in self.date_cache:
+                    folder_meta = self.folder_cache.get(current_id)
+                    if folder_meta is None:
+                        missing.add(current_id)
+                        break
+                    if parse_folder_date(folder_meta.get('name', '')):
+                        break
+                    parents = folder_meta.get('parents')
+                    current_id = parents[0] if parents else None
+            if not missing:
+                return
+
+            def store(request_id, response, exception):
+                # Unreadable ancestors end the walk instead of being retried forever
+                self.folder_cache[request_id] = response if exception is None else {}
+
+            missing = sorted(missing)
+            for start in range(0, len(missing), 100):
+                batch = drive.service.new_batch_http_request(callback=store)
+                for folder_id in missing[start:start + 100]:
+                    batch.add(drive.service.files().get(fileId=folder_id, fields="name, parents"),
+                              request_id=folder_id)
+                drive.execute(batch)
+
+    def find_date_in_parents(self, folder_id):
+        visited = []
+        presentation_date = None
         current_id = folder_id
         while current_id:
-            if current_id in self.folder_cache:
-                folder_meta = self.folder_cache[current_id]
-            else:
-                folder_meta = service.files().get(fileId=current_id, fields="name, parents").execute()
-                self.folder_cache[current_id] = folder_meta
+            if current_id in self.date_cache:
+                presentation_date = self.date_cache[current_id]
+                break
+            visited.append(current_id)
+            folder_meta = self.folder_cache.get(current_id, {})
 
-            name = folder_meta.get('name', '')
-            try:
-                parsed_date = dparser.parse(name, fuzzy=True).date()
-                if 2010 < parsed_date.year < 2030:
-                    return parsed_date
-            except (ValueError, OverflowError):
-                pass
+            presentation_date = parse_folder_date(folder_meta.get('name', ''))
+            if presentation_date:
+                break
 
             parents = folder_meta.get('parents')
             current_id = parents[0] if parents else None
-        return None
 
-    def extract_all_ppt_info(self, path):
-        results = {'circle': None, 'hub': None, 'hub_rank': None, 'city': None,
-                   'city_rank': None, 'final_market_name': None, 'zone_name': None,
-                   'revenue': "N/A", 'rent': "N/A"}
-        try:
-            prs = Presentation(path)
-            if not prs.slides: return results
-            first_slide = prs.slides[0]
-            slide1_text = "".join([shape.text + "\n" for shape in first_slide.shapes if hasattr(shape, "text")])
-
-            zone_match = re.search(r"ZONE\s*:\s*(.*?)(?:\s*STATE|\s*CITY|\s*PIN CODE|$)", slide1_text,
-                                   re.IGNORECASE | re.DOTALL)
-            if zone_match:
-                results['zone_name'] = re.sub(r'\s*\[Image \d+\]\s*', '', zone_match.group(1)).strip()
-
-            market_match = re.search(r".*?_.*?\(.*?\)_.*?\(.*?\)_.*", slide1_text, re.IGNORECASE)
-            if market_match:
-                parts = market_match.group(0).strip().split('_')
-                if len(parts) >= 4:
-                    results['final_market_name'] = parts[-1].strip()
-                    for key, part_idx, rank_key in [('city', -2, 'city_rank'), ('hub', -3, 'hub_rank')]:
-                        p = parts[part_idx].strip()
-                        m = re.search(r"(.*?)\s*\((.*?)\)", p)
-                        results[key] = m.group(1).strip() if m else p
-                        results[rank_key] = m.group(2).strip() if m else None
-                    results['circle'] = re.sub(r'^(Add|BD|Presentation|PPT)\s*', '', parts[-4].strip(),
-                                               flags=re.IGNORECASE).strip()
-
-            for slide in prs.slides:
-                txt = ""
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"): txt += shape.text + " "
-                    if shape.shape_type == MSO_SHAPE_TYPE.TABLE:
-                        for row in shape.table.rows:
-                            for cell in row.cells: txt += cell.text + " "
-                if results['revenue'] == "N/A":
-                    rev_m = re.search(r'GeoIQ Revenue Projection 2025.*?\n?([\d,.]+)', txt, re.IGNORECASE | re.DOTALL)
-                    if rev_m: results['revenue'] = rev_m.group(1).replace(',', '')
-                if results['rent'] == "N/A":
-                    rent_m = re.search(r'Total Rent \+ Maintenance.*?\n?([\d,.]+)', txt, re.IGNORECASE | re.DOTALL)
-                    if rent_m: results['rent'] = rent_m.group(1).replace(',', '')
-            return results
-        except Exception:
-            return results
-
-    def extract_status_from_pdf(self, path):
-        try:
-            text = extract_text(path)
-            lines = [l.strip() for l in text.split('\n') if l.strip()]
-            if not lines: return 'pending'
-            context = " ".join(lines[-2:]).lower()
-            if 'conditionally approved' in context:
-                return 'Conditionally Approved'
-            elif 'approved' in context:
-                return 'Approved'
-            elif any(x in context for x in ['rejected', 'dropped', 'not feasible']):
-                return 'Dropped/Rejected'
-            elif 'hold' in context:
-                return 'Hold'
-            return 'pending'
-        except:
-            return 'pending'
-
-    def extract_retail_link(self, path):
-        try:
-            prs = Presentation(path)
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if not shape.has_text_frame: continue
-                    for para in shape.text_frame.paragraphs:
-                        for run in para.runs:
-                            if "RetailIQ" in run.text and run.hyperlink and run.hyperlink.address:
-                                return run.hyperlink.address
-        except:
-            return None
-        return None
-
-    def get_property_id(self, url):
-        if not url: return None
-        try:
-            params = parse_qs(urlparse(url).query)
-            return params.get('property_id', [None])[0]
-        except:
-            return None
+        # Siblings (and their subfolders) share the walk's result
+        for visited_id in visited:
+            self.date_cache[visited_id] = presentation_date
+        return presentation_date
 
     def get_all_files(self, service, q):
         items, page_token = [], None
         while True:
             res = service.files().list(q=q,
-                                       fields="nextPageToken, files(id, name, webViewLink, mimeType, parents, thumbnailLink)",
+                                       fields="nextPageToken, files(id, name, webViewLink, mimeType, parents, "
+                                              "thumbnailLink, modifiedTime, md5Checksum)",
                                        pageToken=page_token, pageSize=1000).execute()
             items.extend(res.get('files', []))
             page_token = res.get('nextPageToken')
             if not page_token: break
         return items
-
-    def download_file(self, service, file_id, destination):
-        meta = service.files().get(fileId=file_id, fields='mimeType').execute()
-        if meta['mimeType'] == 'application/vnd.google-apps.presentation':
-            request = service.files().export_media(fileId=file_id,
-                                                   mimeType='application/vnd.openxmlformats-officedocument.presentationml.presentation')
-        else:
-            request = service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
-        while not done: _, done = downloader.next_chunk()
-        with open(destination, 'wb') as f:
-            f.write(fh.getvalue())
\ No newline at end of file
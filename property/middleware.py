@@ -0,0 +1,156 @@
+"""
+Response compression negotiated from Accept-Encoding, and async-capable static file serving.
+
+Compression prefers zstd, then brotli, then gzip. zstd and brotli are used only
+when the optional ``zstandard`` / ``brotli`` packages are installed; everything
+else (and async streaming responses) falls through to Django's GZipMiddleware.
+Images, archives and XLSX files are passed through untouched.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Fast levels: these responses are dynamic, so compression time is on every request
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+def _brotli_compress(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _zstd_compress(data):
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def _zstd_sequence(sequence):
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    for chunk in sequence:
+        data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Content-Encoding -> (compress bytes, compress an iterable of bytes), in server preference order
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS['zstd'] = (_zstd_compress, _zstd_sequence)
+if brotli is not None:
+    ENCODERS['br'] = (_brotli_compress, _brotli_sequence)
+
+
+# Content types that are already compressed (PNG thumbnails from slide_proxy; XLSX
+# exports are zip files), so another pass costs CPU and saves nothing. SVG, the
+# one text image type, is still compressed.
+INCOMPRESSIBLE_TYPES = (
+    'image/',
+    'video/',
+    'audio/',
+    'application/zip',
+    'application/gzip',
+    'application/pdf',
+    'application/vnd.openxmlformats-officedocument.',
+)
+
+
+def already_compressed(response):
+    content_type = response.get('Content-Type', '').lower()
+    return content_type.startswith(INCOMPRESSIBLE_TYPES) and not content_type.startswith('image/svg')
+
+
+def accepted_encodings(header):
+    """Codings the client accepts with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if already_compressed(response):
+            return response
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = next((name for name in ENCODERS if name in accepted), None)
+        if encoding is None or (response.streaming and response.is_async):
+            return super().process_response(request, response)
+
+        if not response.streaming and len(response.content) < 200:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        compress, compress_sequence = ENCODERS[encoding]
+        if response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = compress(response.content)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Same ETag weakening as GZipMiddleware, so If-None-Match still matches
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that can also run async. WhiteNoise's own is sync-only,
+    and as the outermost middleware it would pin every ASGI request, including
+    the awaits of the async slide proxy, to Django's single sync thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Same lookup as WhiteNoiseMiddleware: a dict hit, or a stat() with autorefresh in DEBUG
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
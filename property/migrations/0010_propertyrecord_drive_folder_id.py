@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0009_alter_propertyrecord_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyrecord',
+            name='drive_folder_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='propertyrecord',
+            name='source_fingerprint',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:23
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+
+def parse_amount(text):
+    # Frozen copy of property.extraction.parse_amount
+    if not text:
+        return None
+    try:
+        value = Decimal(str(text).replace(',', '').strip())
+    except InvalidOperation:
+        return None
+    if not value.is_finite() or abs(value) >= Decimal('1e12'):
+        return None
+    return value.quantize(Decimal('0.01'))
+
+
+def populate_numeric_financials(apps, schema_editor):
+    PropertyRecord = apps.get_model('property', 'PropertyRecord')
+    batch = []
+    for record in PropertyRecord.objects.only('projected_revenue_lakhs', 'total_rent_maintenance').iterator():
+        record.projected_revenue_value = parse_amount(record.projected_revenue_lakhs)
+        record.total_rent_value = parse_amount(record.total_rent_maintenance)
+        batch.append(record)
+        if len(batch) >= 500:
+            PropertyRecord.objects.bulk_update(batch, ['projected_revenue_value', 'total_rent_value'])
+            batch = []
+    if batch:
+        PropertyRecord.objects.bulk_update(batch, ['projected_revenue_value', 'total_rent_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0010_propertyrecord_drive_folder_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyrecord',
+            name='projected_revenue_value',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyrecord',
+            name='total_rent_value',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=14, null=True),
+        ),
+        migrations.RunPython(populate_numeric_financials, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0011_propertyrecord_numeric_financials'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyrecord',
+            index=models.Index(fields=['-presentation_date', '-id'], name='record_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyrecord',
+            index=models.Index(fields=['zone_name', '-presentation_date', '-id'], name='record_zone_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyrecord',
+            index=models.Index(fields=['status', '-presentation_date', '-id'], name='record_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyrecord',
+            index=models.Index(fields=['zone_name', 'status', '-presentation_date', '-id'], name='record_zone_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'property_record_fts'
+RECORD_TABLE = 'property_propertyrecord'
+# Indexed column -> bm25 weight used by the index's rank column
+COLUMNS = {
+    'property_id': 10.0,
+    'final_market_name': 10.0,
+    'circle': 5.0,
+    'hub': 5.0,
+    'city': 5.0,
+    'zone_name': 3.0,
+    'remarks': 2.0,
+    'slide_text': 1.0,
+}
+
+
+def _values(prefix):
+    return ', '.join(f'{prefix}.{column}' for column in COLUMNS)
+
+
+# External-content FTS5 index over PropertyRecord, kept current by triggers so
+# sync_drive's bulk upserts and update_remarks need no extra code
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {', '.join(COLUMNS)},
+        content='{RECORD_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {RECORD_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {_values('new')});
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {RECORD_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(COLUMNS)}) VALUES ('delete', old.id, {_values('old')});
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF {', '.join(COLUMNS)} ON {RECORD_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(COLUMNS)}) VALUES ('delete', old.id, {_values('old')});
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (new.id, {_values('new')});
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25({', '.join(map(str, COLUMNS.values()))})')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite-only; property.search falls back to icontains elsewhere
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0013_deletedrecord_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyrecord',
+            name='slide_text',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+        migrations.CreateModel(
+            name='PropertyRecordSearch',
+            fields=[
+                ('record', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='property.propertyrecord')),
+                ('query', models.TextField(db_column='property_record_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'property_record_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0014_propertyrecord_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zone_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('circle', models.CharField(blank=True, max_length=100, null=True)),
+                ('hub', models.CharField(blank=True, max_length=100, null=True)),
+                ('month', models.DateField(blank=True, help_text='First day of the presentation month', null=True)),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('approved', models.PositiveIntegerField(default=0)),
+                ('conditionally_approved', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('on_hold', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('revenue_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('rent_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'verbose_name_plural': 'Approval summaries',
+                'indexes': [models.Index(fields=['zone_name', 'circle', 'hub', 'month'], name='summary_group_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:05
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0015_approvalsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('interrupted', 'Interrupted')], db_index=True, default='running', max_length=20)),
+                ('phase', models.CharField(default='listing', max_length=30)),
+                ('owner', models.CharField(help_text='host:pid of the process running the job', max_length=100)),
+                ('attempts', models.PositiveIntegerField(default=1)),
+                ('total_folders', models.PositiveIntegerField(default=0)),
+                ('processed_folders', models.PositiveIntegerField(default=0)),
+                ('failed_folders', models.PositiveIntegerField(default=0)),
+                ('unchanged_folders', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('attempt_started_at', models.DateTimeField(blank=True, null=True)),
+                ('attempt_resumed_folders', models.PositiveIntegerField(default=0)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('folder_id', models.CharField(max_length=100)),
+                ('adopted_record_id', models.BigIntegerField(blank=True, help_text='Legacy row the folder claims', null=True)),
+                ('values', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='property.syncjob')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'folder_id'), name='checkpoint_job_folder_uniq')],
+            },
+        ),
+    ]
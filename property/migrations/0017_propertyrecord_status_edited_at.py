@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0016_syncjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyrecord',
+            name='status_edited_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
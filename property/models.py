@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -5,6 +6,11 @@ class PropertyRecord(models.Model):
     # Unique Identifiers
     property_id = models.CharField(max_length=50, null=True, blank=True)
 
+    # Sync bookkeeping: the source Drive folder and a hash of its inputs,
+    # so sync_drive only re-processes folders that changed
+    drive_folder_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    source_fingerprint = models.CharField(max_length=40, null=True, blank=True)
+
     # --- NEW FIELD: Presentation Date ---
     # Captures the date from parent folders (e.g., "25 Jan 2015")
     presentation_date = models.DateField(null=True, blank=True,
@@ -23,11 +29,19 @@ class PropertyRecord(models.Model):
     # Captured Metadata
     zone_name = models.CharField(max_length=100, null=True, blank=True)
     status = models.CharField(max_length=50, default='pending')
+    # Set when a user picks the status in the dashboard; sync_drive then leaves it alone
+    status_edited_at = models.DateTimeField(null=True, blank=True)
 
     # Financial Projections (Extracted from PPT)
     projected_revenue_lakhs = models.CharField(max_length=100, null=True, blank=True)
     total_rent_maintenance = models.CharField(max_length=100, null=True, blank=True)
 
+    # Numeric copies of the above for DB-side filtering, sorting and totals (NULL when "N/A")
+    projected_revenue_value = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True,
+                                                  db_index=True)
+    total_rent_value = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True,
+                                           db_index=True)
+
     # Resource Links
     ppt_link = models.URLField(max_length=1000, null=True, blank=True)
     ai_summary_link = models.URLField(max_length=1000, null=True, blank=True)
@@ -37,15 +51,137 @@ class PropertyRecord(models.Model):
     # Co-Founder Section
     remarks = models.TextField(null=True, blank=True)
 
+    # Text of the slides sync_drive read, indexed for full-text search (see search.py)
+    slide_text = models.TextField(null=True, blank=True)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Delta API watermark
 
     class Meta:
         ordering = ['-presentation_date', '-created_at']  # Sort by meeting date first
         verbose_name = "Property Record"
         verbose_name_plural = "Property Records"
+        # Matched to the dashboard/API query shapes: optional zone and/or status
+        # equality filters, a presentation_date range, ordered newest first.
+        # The zone- and status-leading indexes also serve the DISTINCT lookups
+        # behind the filter dropdowns.
+        indexes = [
+            models.Index(fields=['-presentation_date', '-id'], name='record_date_idx'),
+            models.Index(fields=['zone_name', '-presentation_date', '-id'], name='record_zone_date_idx'),
+            models.Index(fields=['status', '-presentation_date', '-id'], name='record_status_date_idx'),
+            models.Index(fields=['zone_name', 'status', '-presentation_date', '-id'],
+                         name='record_zone_status_date_idx'),
+        ]
 
     def __str__(self):
         date_str = self.presentation_date.strftime('%Y-%m-%d') if self.presentation_date else "No Date"
-        return f"[{date_str}] {self.final_market_name or 'Unknown Market'} - {self.status}"
\ No newline at end of file
+        return f"[{date_str}] {self.final_market_name or 'Unknown Market'} - {self.status}"
+
+
+class DeletedRecord(models.Model):
+    """Tombstone left when a PropertyRecord is deleted, so the delta API can report it."""
+    record_id = models.BigIntegerField()
+    drive_folder_id = models.CharField(max_length=100, null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Deleted record {self.record_id} at {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class PropertyRecordSearch(models.Model):
+    """
+    Read-only view of the ``property_record_fts`` FTS5 index (see search.py),
+    joined to PropertyRecord so a search runs as one MATCH pass with its bm25 rank.
+    """
+    record = models.OneToOneField(PropertyRecord, on_delete=models.DO_NOTHING, primary_key=True,
+                                  db_column='rowid', related_name='search_entry')
+    # FTS5 reads "<table> = 'query'" on the hidden table-named column as MATCH
+    query = models.TextField(db_column='property_record_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'property_record_fts'
+
+
+class ApprovalSummary(models.Model):
+    """
+    Approval counts and financial totals per zone / circle / hub / month,
+    precomputed by property.analytics so nothing aggregates PropertyRecord at request time.
+    """
+    zone_name = models.CharField(max_length=100, null=True, blank=True)
+    circle = models.CharField(max_length=100, null=True, blank=True)
+    hub = models.CharField(max_length=100, null=True, blank=True)
+    month = models.DateField(null=True, blank=True, help_text="First day of the presentation month")
+
+    records = models.PositiveIntegerField(default=0)
+    approved = models.PositiveIntegerField(default=0)
+    conditionally_approved = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    on_hold = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+
+    revenue_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    rent_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['zone_name', 'circle', 'hub', 'month'], name='summary_group_idx'),
+        ]
+        verbose_name_plural = "Approval summaries"
+
+    def __str__(self):
+        return f"{self.zone_name} / {self.circle} / {self.hub} / {self.month}: {self.records} records"
+
+
+class SyncJob(models.Model):
+    """
+    One sync_drive run. A run that crashes or is stopped is picked up again by
+    the next one, which resumes from its checkpoints (see property/jobs.py).
+    """
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    INTERRUPTED = 'interrupted'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (INTERRUPTED, 'Interrupted'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RUNNING, db_index=True)
+    phase = models.CharField(max_length=30, default='listing')  # listing, processing, publishing, thumbnails
+    owner = models.CharField(max_length=100, help_text="host:pid of the process running the job")
+    attempts = models.PositiveIntegerField(default=1)
+
+    # Changed folders to download and parse; unchanged ones are counted but cost nothing
+    total_folders = models.PositiveIntegerField(default=0)
+    processed_folders = models.PositiveIntegerField(default=0)
+    failed_folders = models.PositiveIntegerField(default=0)
+    unchanged_folders = models.PositiveIntegerField(default=0)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    # The ETA is extrapolated from the current attempt only, not from checkpoints it resumed
+    attempt_started_at = models.DateTimeField(null=True, blank=True)
+    attempt_resumed_folders = models.PositiveIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Sync #{self.pk} ({self.status})"
+
+
+class SyncCheckpoint(models.Model):
+    """A folder a SyncJob has already downloaded and parsed, with the record it produced."""
+    job = models.ForeignKey(SyncJob, on_delete=models.CASCADE, related_name='checkpoints')
+    folder_id = models.CharField(max_length=100)
+    adopted_record_id = models.BigIntegerField(null=True, blank=True, help_text="Legacy row the folder claims")
+    values = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'folder_id'], name='checkpoint_job_folder_uniq'),
+        ]
@@ -0,0 +1,184 @@
+"""
+Keyset (cursor) pagination for the dashboard and the mobile API.
+
+Pages are fetched with ``WHERE (sort column, id) is past the cursor ... LIMIT n``
+instead of ``OFFSET``, so page 500 costs the same as page 1. Rows whose sort
+column is NULL come last and are walked by id alone once the non-NULL rows run out.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .filters import SORT_KEYS, order_records, requested_sort, sort_key
+from .models import PropertyRecord
+from .versioning import data_version
+
+
+def encode_cursor(value, pk):
+    payload = json.dumps([None if value is None else str(value), pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, column):
+    """Returns (value, pk) for a cursor token, or None if it is malformed."""
+    if not token:
+        return None
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if value is not None:
+            try:
+                value = PropertyRecord._meta.get_field(column).to_python(value)
+            except FieldDoesNotExist:
+                value = float(value)  # Annotations such as the search rank
+        return value, int(pk)
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+class KeysetPage(list):
+    """One page of records plus the cursors for the pages either side of it."""
+
+    def __init__(self, records, next_cursor, previous_cursor, is_first):
+        super().__init__(records)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.has_next = next_cursor is not None
+        self.has_previous = not is_first
+
+
+def record_cursor(record, column):
+    return encode_cursor(getattr(record, column), record.pk)
+
+
+def paginate_keyset(queryset, sort, cursor, per_page, before=None):
+    """
+    The page after ``cursor``, or with ``before``, the page that ends just ahead of
+    that position. Previous links pass the first record of the current page as
+    ``before``, so walking back lands on the same pages as walking forward.
+    """
+    sort = sort_key(sort)
+    column, descending = SORT_KEYS[sort]
+    queryset = order_records(queryset, sort)
+    end = decode_cursor(before, column)
+    if end is not None:
+        return _page_before(queryset, sort, column, descending, end, per_page)
+
+    position = decode_cursor(cursor, column)
+    past, past_or_equal, before_or_equal = ('lt', 'lte', 'gte') if descending else ('gt', 'gte', 'lte')
+
+    if position is None:
+        non_null = queryset.filter(**{f'{column}__isnull': False})
+        null = queryset.filter(**{f'{column}__isnull': True})
+    elif position[0] is None:
+        non_null, null = None, queryset.filter(**{f'{column}__isnull': True, f'id__{past}': position[1]})
+    else:
+        value, pk = position
+        # "value past cursor, or equal value and id past cursor", written as a range
+        # plus an exclusion so SQLite keeps walking the composite index in order
+        non_null = (queryset.filter(**{f'{column}__{past_or_equal}': value})
+                    .exclude(**{column: value, f'id__{before_or_equal}': pk}))
+        null = queryset.filter(**{f'{column}__isnull': True})
+
+    records = list(non_null[:per_page + 1]) if non_null is not None else []
+    if len(records) <= per_page:
+        records += list(null[:per_page + 1 - len(records)])
+
+    next_cursor = None
+    if len(records) > per_page:
+        records = records[:per_page]
+        next_cursor = record_cursor(records[-1], column)
+    previous_cursor = record_cursor(records[0], column) if position is not None and records else None
+    return KeysetPage(records, next_cursor, previous_cursor, is_first=position is None)
+
+
+def _page_before(queryset, sort, column, descending, end, per_page):
+    # The same ranges as paginate_keyset with every comparison turned around, read
+    # in reverse order (NULLs first), which SQLite walks as the same index backwards
+    ahead, ahead_or_equal, behind_or_equal = ('gt', 'gte', 'lte') if descending else ('lt', 'lte', 'gte')
+    value, pk = end
+    if value is None:
+        null = queryset.filter(**{f'{column}__isnull': True, f'id__{ahead}': pk})
+        non_null = queryset.filter(**{f'{column}__isnull': False})
+    else:
+        null = None
+        non_null = (queryset.filter(**{f'{column}__{ahead_or_equal}': value})
+                    .exclude(**{column: value, f'id__{behind_or_equal}': pk}))
+
+    records = list(null.reverse()[:per_page + 1]) if null is not None else []
+    if len(records) <= per_page:
+        records += list(non_null.reverse()[:per_page + 1 - len(records)])
+    if len(records) <= per_page:
+        # Nothing before this page but a partial one, so show the real first page instead
+        return paginate_keyset(queryset, sort, None, per_page)
+
+    records = records[:per_page][::-1]
+    return KeysetPage(records, record_cursor(records[-1], column), record_cursor(records[0], column), is_first=False)
+
+
+def cached_count(queryset, version=None):
+    """
+    COUNT(*) for a filtered queryset, shared across requests until the next record
+    change. Callers that cache what they render under a data version pass that
+    one, so the count they show is never newer than the page around it.
+    """
+    if version is None:
+        version = data_version()
+    key = f'record-count:{version}:' + hashlib.md5(str(queryset.order_by().query).encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, settings.RECORD_COUNT_CACHE_SECONDS)
+
+
+def requested_page_size(params, default, maximum):
+    try:
+        return min(max(int(params['page_size']), 1), maximum)
+    except (KeyError, ValueError):
+        return default
+
+
+class RecordKeysetPagination(BasePagination):
+    """
+    Keyset pagination for PropertyRecordListAPIView: ?cursor= pages forward, ?before=
+    back; ?page_size= is capped at max_page_size.
+    """
+    page_size = 100
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        page_size = requested_page_size(params, self.page_size, self.max_page_size)
+        self.request = request
+        self.count = cached_count(queryset)
+        self.page = paginate_keyset(queryset, requested_sort(params), params.get('cursor'), page_size,
+                                    before=params.get('before'))
+        return list(self.page)
+
+    def get_next_link(self):
+        if not self.page.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'before')
+        return replace_query_param(url, 'cursor', self.page.next_cursor)
+
+    def get_previous_link(self):
+        if not self.page.previous_cursor:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'cursor')
+        return replace_query_param(url, 'before', self.page.previous_cursor)
+
+    def get_first_link(self):
+        return remove_query_param(remove_query_param(self.request.build_absolute_uri(), 'cursor'), 'before')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        })
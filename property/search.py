@@ -0,0 +1,105 @@
+"""
+Ranked prefix search over PropertyRecord, backed by an SQLite FTS5 index.
+
+``property_record_fts`` is an external-content FTS5 table created in migration
+0014 and kept current by triggers on the record table, so sync_drive's bulk
+upserts, dashboard edits and admin edits all reach the index without extra code.
+It is mapped read-only as PropertyRecordSearch for the join. Other databases
+fall back to unranked ``icontains`` matching.
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+
+from .models import PropertyRecord, PropertyRecordSearch
+
+FTS_TABLE = 'property_record_fts'
+# Indexed column -> bm25 weight (a hit in the market name counts ten times a hit in
+# slide text); migration 0014 stores these as the index's default rank function
+SEARCH_COLUMNS = {
+    'property_id': 10.0,
+    'final_market_name': 10.0,
+    'circle': 5.0,
+    'hub': 5.0,
+    'city': 5.0,
+    'zone_name': 3.0,
+    'remarks': 2.0,
+    'slide_text': 1.0,
+}
+MAX_TERMS = 8
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(text):
+    """
+    FTS5 query for free text: every word must match as a prefix. Words are
+    quoted, so operators and punctuation typed by users are never parsed as syntax.
+    """
+    terms = _TERM.findall(text or '')[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_records(queryset, text, ranked=True):
+    """
+    Restricts ``queryset`` to records matching ``text``. With ``ranked`` it also
+    annotates ``search_rank`` (lower is better), for ordering by relevance.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return queryset
+
+    if connections[queryset.db].vendor != 'sqlite':
+        terms = _TERM.findall(text)[:MAX_TERMS]
+        for term in terms:
+            queryset = queryset.filter(Q(*[(f'{column}__icontains', term) for column in SEARCH_COLUMNS],
+                                         _connector=Q.OR))
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if not ranked:
+        # Sorted by something else: the matches become a set that SQLite probes while it
+        # walks that order's index, stopping once a page is full, instead of looking up
+        # and sorting every match first. "id + 0" stops it driving the query from the set.
+        matches = PropertyRecordSearch.objects.filter(query=expression).values('record_id')
+        return queryset.alias(search_id=F('id') + 0).filter(search_id__in=matches)
+    # Joined rather than correlated, so FTS5 evaluates the query once for all rows
+    return queryset.filter(search_entry__query=expression).annotate(search_rank=F('search_entry__rank'))
+
+
+# --- Trigger upkeep ---
+# Django rebuilds a SQLite table (and so drops its triggers) for many schema
+# changes; after every migrate the triggers are recreated and the index rebuilt
+# if any had gone missing.
+def _trigger_sql():
+    table = PropertyRecord._meta.db_table
+    columns = ', '.join(SEARCH_COLUMNS)
+
+    def values(prefix):
+        return ', '.join(f'{prefix}.{column}' for column in SEARCH_COLUMNS)
+
+    delete_old = (f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                  f"VALUES ('delete', old.id, {values('old')});")
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {values('new')});"
+    return {
+        f'{FTS_TABLE}_insert': f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f'{FTS_TABLE}_delete': f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f'{FTS_TABLE}_update': (f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF {columns} ON {table} "
+                                f"BEGIN {delete_old} {insert_new} END"),
+    }
+
+
+def ensure_search_triggers(using='default', **kwargs):
+    """post_migrate handler: recreates missing FTS triggers and rebuilds the index if it had drifted."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                       [PropertyRecord._meta.db_table])
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = {name: sql for name, sql in _trigger_sql().items() if name not in existing}
+        for sql in missing.values():
+            cursor.execute(sql)
+        if missing:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
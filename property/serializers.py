@@ -1,7 +1,29 @@
 from rest_framework import serializers
 from .models import PropertyRecord
 
+# Sync bookkeeping, never sent to clients
+INTERNAL_FIELDS = ('drive_folder_id', 'source_fingerprint', 'status_edited_at')
+# Sent only when named in ?fields=; slide text runs to ~20 KB per record
+OPT_IN_FIELDS = ('slide_text',)
+
+
+def sparse_fields(request):
+    """Field names asked for with ?fields=id,status,...; unknown names are ignored, None means all."""
+    raw = request.query_params.get('fields') if request is not None else None
+    if not raw:
+        return None
+    known = {field.name for field in PropertyRecord._meta.concrete_fields} - set(INTERNAL_FIELDS)
+    fields = [name for name in (part.strip() for part in raw.split(',')) if name in known]
+    return fields or None
+
+
 class PropertyRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = PropertyRecord
-        fields = '__all__' # Sends all fields including financial and resource links
\ No newline at end of file
+        exclude = INTERNAL_FIELDS  # Sends everything else, including financial and resource links
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = sparse_fields(self.context.get('request'))
+        for name in set(self.fields) - set(requested) if requested else OPT_IN_FIELDS:
+            self.fields.pop(name)
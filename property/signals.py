@@ -0,0 +1,41 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics import GROUPING_FIELDS, SUMMARY_FIELDS, group_of, refresh_groups
+from .facets import FACET_FIELDS, invalidate_facets
+from .models import DeletedRecord, PropertyRecord
+from .versioning import bump_data_version
+
+
+@receiver(pre_save, sender=PropertyRecord)
+def record_saving(sender, instance, update_fields=None, **kwargs):
+    # An edit may move the record to another summary group; remember the one it leaves
+    instance._previous_group = None
+    if instance.pk and (update_fields is None or set(update_fields) & set(GROUPING_FIELDS)):
+        previous = PropertyRecord.objects.filter(pk=instance.pk).only(*GROUPING_FIELDS).first()
+        if previous is not None:
+            instance._previous_group = group_of(previous)
+
+
+@receiver(post_save, sender=PropertyRecord)
+def record_saved(sender, instance, created, update_fields=None, **kwargs):
+    changed = set(update_fields) if update_fields is not None else None
+    if changed is None or changed & set(SUMMARY_FIELDS):
+        groups = {group_of(instance), getattr(instance, '_previous_group', None)} - {None}
+        transaction.on_commit(partial(refresh_groups, groups))
+    # A remarks-only save cannot move a record between facet values
+    if changed is None or changed & set(FACET_FIELDS.values()):
+        transaction.on_commit(invalidate_facets)
+    transaction.on_commit(bump_data_version)
+
+
+@receiver(post_delete, sender=PropertyRecord)
+def record_deleted(sender, instance, **kwargs):
+    # Tombstone for the delta API; part of the deleting transaction, so it rolls back with it
+    DeletedRecord.objects.create(record_id=instance.pk, drive_folder_id=instance.drive_folder_id)
+    transaction.on_commit(partial(refresh_groups, [group_of(instance)]))
+    transaction.on_commit(invalidate_facets)
+    transaction.on_commit(bump_data_version)
@@ -1,3 +1,1327 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import gzip
+import html
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.http import FileResponse, HttpResponse, QueryDict, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pdfminer.high_level import extract_text
+from pdfminer.pdfinterp import PDFPageInterpreter
+from pptx import Presentation
+from pptx.util import Inches
+
+from . import middleware, thumbnails
+from .analytics import STATUS_COLUMNS, group_of, rebuild_summary, refresh_groups
+from .delta import changes_since
+from .drive import PPTX_MIME_TYPE, SLIDES_MIME_TYPE, DownloadStore
+from .exports import buffered
+from .extraction import (extract_all_ppt_info, extract_pptx, extract_retail_link, extract_status_from_pdf,
+                         parse_amount, parse_folder_date, parse_folder_files, tail_pdf_lines)
+from .facets import FACETS_CACHE_KEY, get_facets
+from .filters import SORT_KEYS, filter_records, order_records
+from .jobs import start_job
+from .management.commands import sync_drive
+from .management.commands.load_test_sqlite import TEST_CACHES
+from .models import ApprovalSummary, PropertyRecord, SyncCheckpoint, SyncJob
+from .pagination import paginate_keyset
+from .search import search_records
+from .thumbnails import ThumbnailCache, make_etag
+from .versioning import data_version
+from .views import NO_PREVIEW_URL
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CacheIsolatedTestCase(TestCase):
+    """Runs against empty local-memory caches, so counts and pages never outlive a test's rows."""
+
+    def setUp(self):
+        for alias_cache in caches.all():
+            alias_cache.clear()
+
+
+# --- Extraction ---
+def make_deck(path, slides, first=None):
+    """
+    Saves a deck with one slide per list of shapes: ('text', text),
+    ('link', text, url) or ('table', rows). ``first`` moves that slide to the
+    front of the presentation, away from its position in the zip.
+    """
+    prs = Presentation()
+    for shapes in slides:
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        for n, (kind, *args) in enumerate(shapes):
+            top = Inches(0.5 + n)
+            if kind == 'table':
+                table = slide.shapes.add_table(len(args[0]), len(args[0][0]), Inches(0.5), top,
+                                               Inches(6), Inches(1)).table
+                for r, row in enumerate(args[0]):
+                    for c, value in enumerate(row):
+                        table.cell(r, c).text = value
+            else:
+                run = slide.shapes.add_textbox(Inches(0.5), top, Inches(6), Inches(1)).text_frame.paragraphs[0].add_run()
+                run.text = args[0]
+                if kind == 'link':
+                    run.hyperlink.address = args[1]
+    if first is not None:
+        slide_ids = prs.slides._sldIdLst
+        slide_ids.insert(0, slide_ids[first])
+    prs.save(path)
+    return path
+
+
+HEADER_SLIDE = [('text', 'ZONE : North\nSTATE: Delhi'), ('text', 'BD Circle 1_Hub A (3)_City B (12)_Sector 5 Market')]
+REVENUE_SLIDE = [('table', [['GeoIQ Revenue Projection 2025', '12.5']])]
+RENT_SLIDE = [('link', 'RetailIQ report', 'https://retailiq.example.com/site?property_id=P-42'),
+              ('text', 'Total Rent + Maintenance\n1,20,000')]
+APPENDIX_SLIDE = [('text', 'Appendix: GeoIQ Revenue Projection 2025 99')]
+
+
+class PptxExtractionTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def deck(self, slides, **kwargs):
+        return make_deck(os.path.join(self.directory, f'deck{len(os.listdir(self.directory))}.pptx'), slides, **kwargs)
+
+    def legacy(self, path):
+        return extract_all_ppt_info(path), extract_retail_link(path)
+
+    def test_matches_python_pptx_and_stops_once_everything_is_found(self):
+        path = self.deck([HEADER_SLIDE, REVENUE_SLIDE, RENT_SLIDE, APPENDIX_SLIDE])
+        text_parts = []
+        ppt_info, retail_url = extract_pptx(path, text_parts)
+        self.assertEqual((ppt_info, retail_url), self.legacy(path))
+        self.assertEqual(
+            {key: ppt_info[key] for key in ('zone_name', 'circle', 'hub', 'hub_rank', 'city', 'city_rank',
+                                            'final_market_name', 'revenue', 'rent', 'rent_value')},
+            {'zone_name': 'North', 'circle': 'Circle 1', 'hub': 'Hub A', 'hub_rank': '3', 'city': 'City B',
+             'city_rank': '12', 'final_market_name': 'Sector 5 Market', 'revenue': '12.5', 'rent': '120000',
+             'rent_value': Decimal('120000.00')})
+        self.assertEqual(retail_url, 'https://retailiq.example.com/site?property_id=P-42')
+        # The appendix comes after the last figure, so it is never read
+        self.assertEqual(len(text_parts), 3)
+
+    def test_reads_every_slide_when_a_figure_is_missing(self):
+        path = self.deck([HEADER_SLIDE, REVENUE_SLIDE, APPENDIX_SLIDE])
+        text_parts = []
+        ppt_info, retail_url = extract_pptx(path, text_parts)
+        self.assertEqual((ppt_info, retail_url), self.legacy(path))
+        self.assertEqual((ppt_info['rent'], ppt_info['rent_value'], retail_url), ('N/A', None, None))
+        self.assertEqual(len(text_parts), 3)
+
+    def test_follows_presentation_order_rather_than_zip_order(self):
+        path = self.deck([REVENUE_SLIDE, RENT_SLIDE, HEADER_SLIDE], first=2)
+        ppt_info, retail_url = extract_pptx(path)
+        self.assertEqual((ppt_info, retail_url), self.legacy(path))
+        self.assertEqual(ppt_info['zone_name'], 'North')
+
+    def test_parse_folder_files(self):
+        parsed = parse_folder_files(self.deck([HEADER_SLIDE, REVENUE_SLIDE, RENT_SLIDE]))
+        self.assertEqual((parsed['property_id'], parsed['status'], parsed['pdf_seconds']), ('P-42', 'pending', None))
+        self.assertIn('Sector 5 Market', parsed['slide_text'])
+
+        broken = os.path.join(self.directory, 'broken.pptx')
+        with open(broken, 'wb') as f:
+            f.write(b'not a zip')
+        parsed = parse_folder_files(broken)
+        self.assertEqual((parsed['ppt_info'], parsed['property_id']), (extract_all_ppt_info(broken), None))
+
+
+def make_pdf(pages):
+    """A minimal PDF with one line of Helvetica text per string, one page per list."""
+    font_id, pages_id = 3 + 2 * len(pages), 2
+    objects = {1: b'<< /Type /Catalog /Pages 2 0 R >>'}
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 3 + 2 * i, 4 + 2 * i
+        kids.append(f'{page_id} 0 R')
+        stream = ''.join(f'BT /F1 12 Tf 72 {720 - 20 * n} Td ({line}) Tj ET\n' for n, line in enumerate(lines)).encode()
+        objects[page_id] = (f'<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 612 792] '
+                            f'/Contents {content_id} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>').encode()
+        objects[content_id] = b'<< /Length %d >>\nstream\n%sendstream' % (len(stream), stream)
+    objects[pages_id] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(pages)} >>'.encode()
+    objects[font_id] = b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+
+    out, offsets = bytearray(b'%PDF-1.4\n'), {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, objects[number])
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offsets[number] for number in sorted(objects))
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+class PdfTailTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.process_page = mock.patch.object(PDFPageInterpreter, 'process_page', autospec=True,
+                                              side_effect=PDFPageInterpreter.process_page).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def pdf(self, pages):
+        path = os.path.join(self.directory, f'summary{len(os.listdir(self.directory))}.pdf')
+        with open(path, 'wb') as f:
+            f.write(make_pdf(pages))
+        return path
+
+    def legacy(self, path):
+        # The pdfminer full-text extraction this replaced
+        lines = [line.strip() for line in extract_text(path).split('\n') if line.strip()]
+        return lines[-2:]
+
+    def test_lays_out_only_the_last_page_when_it_is_enough(self):
+        path = self.pdf([['Summary of site', 'Weak footfall'], ['Committee view', 'Decision: Approved']])
+        self.assertEqual(tail_pdf_lines(path), ['Committee view', 'Decision: Approved'])
+        self.assertEqual(self.process_page.call_count, 1)
+        self.assertEqual(tail_pdf_lines(path), self.legacy(path))
+
+    def test_widens_backwards_past_short_and_empty_pages(self):
+        path = self.pdf([['Summary of site', 'Decision: On hold'], ['Signed'], []])
+        self.assertEqual(tail_pdf_lines(path), ['Decision: On hold', 'Signed'])
+        self.assertEqual(self.process_page.call_count, 3)
+        self.assertEqual(tail_pdf_lines(path), self.legacy(path))
+
+    def test_short_documents(self):
+        self.assertEqual(tail_pdf_lines(self.pdf([['Approved']])), ['Approved'])
+        self.assertEqual(tail_pdf_lines(self.pdf([[], []])), [])
+
+    def test_status_from_pdf(self):
+        for lines, status in [(['Decision:', 'Conditionally approved'], 'Conditionally Approved'),
+                              (['Decision:', 'Approved'], 'Approved'),
+                              (['Not feasible', 'for now'], 'Dropped/Rejected'),
+                              (['Decision:', 'Hold'], 'Hold'),
+                              (['Decision:', 'Pending review'], 'pending'),
+                              ([], 'pending')]:
+            with self.subTest(lines=lines):
+                self.assertEqual(extract_status_from_pdf(self.pdf([['Summary of site'] + lines])), status)
+        # Only the last two lines count
+        self.assertEqual(extract_status_from_pdf(self.pdf([['Approved', 'Decision:', 'Pending']])), 'pending')
+
+        broken = os.path.join(self.directory, 'broken.pdf')
+        with open(broken, 'wb') as f:
+            f.write(b'not a pdf')
+        self.assertEqual(extract_status_from_pdf(broken), 'pending')
+
+
+class ParseAmountTests(SimpleTestCase):
+    CASES = [
+        ('12.5', Decimal('12.50')),
+        ('1,20,000', Decimal('120000.00')),
+        ('1,00,00,000', Decimal('10000000.00')),
+        ('120,000', Decimal('120000.00')),
+        (' 3.456 ', Decimal('3.46')),
+        ('0', Decimal('0.00')),
+        ('N/A', None),
+        ('', None),
+        (None, None),
+        ('1.2.3', None),
+        ('NaN', None),
+        ('Infinity', None),
+        ('1000000000000', None),
+    ]
+
+    def test_extracted_figures(self):
+        for text, expected in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(parse_amount(text), expected)
+
+    def test_migration_backfill_matches(self):
+        backfill = importlib.import_module('property.migrations.0011_propertyrecord_numeric_financials')
+        for text, expected in self.CASES:
+            with self.subTest(text=text):
+                self.assertEqual(backfill.parse_amount(text), expected)
+
+
+class FolderDateTests(SimpleTestCase):
+    def test_common_layouts(self):
+        expected = datetime.date(2025, 3, 14)
+        for name in ['14 Mar 2025', '14th March 2025', 'March 14, 2025', '2025-03-14', '14-Mar-2025',
+                     'Meeting_14_Mar_2025', '14.03.2025']:
+            with self.subTest(name=name):
+                self.assertEqual(parse_folder_date(name), expected)
+
+    def test_compact_names(self):
+        self.assertEqual(parse_folder_date('14Mar2025'), datetime.date(2025, 3, 14))
+        self.assertEqual(parse_folder_date('PPT 14mar25 Delhi'), datetime.date(2025, 3, 14))
+        self.assertEqual(parse_folder_date('1stApril2025'), datetime.date(2025, 4, 1))
+        self.assertEqual(parse_folder_date('20250314'), datetime.date(2025, 3, 14))
+
+    def test_names_without_a_date(self):
+        for name in ['Market 5', 'Presentations', 'Maybe later', 'Summary 12']:
+            with self.subTest(name=name):
+                self.assertIsNone(parse_folder_date(name))
+
+
+class QueryPlanTests(TestCase):
+    def test_dashboard_and_api_queries_use_indexes(self):
+        # Raises CommandError if any query scans the table or sorts its matches
+        call_command('check_query_plans', rows=100_000, stdout=io.StringIO())
+
+
+class RangeFilterTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rents = [None, Decimal('0.00'), Decimal('50000.00'), Decimal('120000.00'), Decimal('10000000.00')]
+        revenues = [Decimal('5.50'), None, Decimal('10.00'), Decimal('12.50'), Decimal('40.00')]
+        for i, (rent, revenue) in enumerate(zip(rents, revenues)):
+            PropertyRecord.objects.create(final_market_name=f'Market {i}', total_rent_value=rent,
+                                          projected_revenue_value=revenue,
+                                          presentation_date=datetime.date(2025, 1, 1 + i))
+        cls.user = User.objects.create_user('viewer')
+
+    def markets(self, query, sort=None):
+        params = QueryDict(mutable=True)
+        params.update(query)
+        if sort:
+            params['sort'] = sort
+        return sorted(filter_records(PropertyRecord.objects.all(), params).values_list('final_market_name', flat=True))
+
+    def test_bounds_are_inclusive(self):
+        cases = [
+            ({'min_rent': '50000'}, ['Market 2', 'Market 3', 'Market 4']),
+            ({'max_rent': '50000'}, ['Market 1', 'Market 2']),
+            ({'min_rent': '1,20,000', 'max_rent': '1,00,00,000'}, ['Market 3', 'Market 4']),
+            ({'min_revenue': '10'}, ['Market 2', 'Market 3', 'Market 4']),
+            ({'max_revenue': '12.5'}, ['Market 0', 'Market 2', 'Market 3']),
+            ({'min_revenue': '10', 'max_rent': '120000'}, ['Market 2', 'Market 3']),
+        ]
+        for query, expected in cases:
+            # Filtering on the sort column and on another column take different paths
+            for sort in ('date', 'rent_asc', 'revenue_desc'):
+                with self.subTest(query=query, sort=sort):
+                    self.assertEqual(self.markets(query, sort), expected)
+
+    def test_bad_values_are_ignored(self):
+        everything = self.markets({})
+        self.assertEqual(len(everything), 5)
+        for value in ['abc', 'NaN', 'Infinity', '-inf', '', '1.2.3']:
+            for param in ('min_rent', 'max_rent', 'min_revenue', 'max_revenue'):
+                with self.subTest(param=param, value=value):
+                    self.assertEqual(self.markets({param: value}), everything)
+        self.assertEqual(self.markets({'start_date': '2025-13-01', 'end_date': 'soon'}), everything)
+
+    def test_api_and_dashboard_ignore_bad_values(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('api_property_list'), {'min_rent': 'lots', 'max_revenue': '12.5'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 3)
+        response = self.client.get(reverse('property_dashboard'), {'min_revenue': 'abc', 'start_date': 'soon'})
+        self.assertContains(response, 'Total Items: 5')
+
+
+class KeysetPaginationTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Few distinct values and NULLs in every sort column, so pages break inside runs of ties
+        dates = [datetime.date(2025, 1, 1), datetime.date(2025, 1, 1), datetime.date(2025, 2, 1), None]
+        revenues = [Decimal('10.00'), Decimal('10.00'), None, Decimal('5.50')]
+        for i in range(23):
+            PropertyRecord.objects.create(
+                drive_folder_id=f'folder-{i}', final_market_name=f'Market {i % 3}',
+                presentation_date=dates[i % 4], projected_revenue_value=revenues[i % 4],
+                total_rent_value=None if i % 5 == 0 else Decimal(50_000 * (i % 2)))
+        cls.user = User.objects.create_user('viewer', is_staff=True)
+
+    def walk(self, queryset, sort, per_page=4):
+        ids, cursor = [], None
+        while True:
+            page = paginate_keyset(queryset, sort, cursor, per_page)
+            ids += [record.pk for record in page]
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_cursor_pages_cover_every_record_once_in_order(self):
+        queryset = PropertyRecord.objects.all()
+        for sort in SORT_KEYS:
+            if sort == 'relevance':
+                continue
+            with self.subTest(sort=sort):
+                expected = list(order_records(queryset, sort).values_list('pk', flat=True))
+                self.assertEqual(self.walk(queryset, sort), expected)
+                self.assertEqual(len(expected), 23)
+
+    def test_previous_pages_match_the_pages_walked_forward(self):
+        queryset = PropertyRecord.objects.all()
+        for sort in SORT_KEYS:
+            if sort == 'relevance':
+                continue
+            with self.subTest(sort=sort):
+                pages, page = [], paginate_keyset(queryset, sort, None, 4)
+                while True:
+                    pages.append([record.pk for record in page])
+                    if not page.has_next:
+                        break
+                    page = paginate_keyset(queryset, sort, page.next_cursor, 4)
+
+                backwards = []
+                while page.previous_cursor:
+                    page = paginate_keyset(queryset, sort, None, 4, before=page.previous_cursor)
+                    backwards.append([record.pk for record in page])
+                self.assertEqual(backwards, pages[-2::-1])
+                self.assertFalse(page.has_previous)
+
+    @mock.patch('property.views.PropertyDashboardView.per_page', 10)
+    def test_dashboard_previous_link(self):
+        self.client.force_login(self.user)
+        url = reverse('property_dashboard')
+
+        def follow(response, label):
+            href = re.search(rf'href="([^"]*)"[^>]*>[^<]*{label}', response.content.decode()).group(1)
+            return self.client.get(url + html.unescape(href))
+
+        def ids(response):
+            return [record.pk for record in response.context['page_obj']]
+
+        first = self.client.get(url, {'sort': 'rent_asc'})
+        self.assertNotContains(first, 'Previous Page')
+        second = follow(first, 'Next Page')
+        third = follow(second, 'Next Page')
+        self.assertEqual(ids(follow(third, 'Previous Page')), ids(second))
+        back_to_first = follow(second, 'Previous Page')
+        self.assertEqual(ids(back_to_first), ids(first))
+        self.assertNotContains(back_to_first, 'Previous Page')
+
+    def test_dashboard_total_follows_writes(self):
+        self.client.force_login(self.user)
+        url = reverse('property_dashboard')
+        self.assertContains(self.client.get(url), 'Total Items: 23')
+        with self.captureOnCommitCallbacks(execute=True):
+            PropertyRecord.objects.create(final_market_name='New market')
+        self.assertContains(self.client.get(url), 'Total Items: 24')
+
+
+class RecordListApiTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(9):
+            PropertyRecord.objects.create(final_market_name=f'Market {i}', zone_name='Zone A' if i % 3 else 'Zone B',
+                                          total_rent_value=Decimal(50_000 * (i % 2)))
+        cls.user = User.objects.create_user('viewer')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_next_links_walk_every_record_once(self):
+        url, ids = reverse('api_property_list') + '?page_size=2&sort=rent_asc', []
+        while url:
+            data = self.client.get(url).json()
+            self.assertEqual(data['count'], 9)
+            ids += [record['id'] for record in data['results']]
+            url = data['next']
+        expected = list(order_records(PropertyRecord.objects.all(), 'rent_asc').values_list('pk', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_links_walk_back_over_the_same_pages(self):
+        url, pages = reverse('api_property_list') + '?page_size=2&sort=rent_desc', []
+        while url:
+            data = self.client.get(url).json()
+            pages.append([record['id'] for record in data['results']])
+            url, previous = data['next'], data['previous']
+        self.assertEqual(len(pages), 5)
+
+        backwards = []
+        while previous:
+            data = self.client.get(previous).json()
+            backwards.append([record['id'] for record in data['results']])
+            previous = data['previous']
+        self.assertEqual(backwards, pages[-2::-1])
+
+    def test_filters_and_sparse_fields(self):
+        data = self.client.get(reverse('api_property_list'), {'zone': 'Zone B', 'fields': 'id,zone_name'}).json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual({tuple(record) for record in data['results']}, {('id', 'zone_name')})
+        self.assertEqual({record['zone_name'] for record in data['results']}, {'Zone B'})
+
+    def test_counts_follow_writes(self):
+        url = reverse('api_property_list') + '?zone=Zone X'
+        self.assertEqual(self.client.get(url).json()['count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            record = PropertyRecord.objects.create(zone_name='Zone X')
+        self.assertEqual(self.client.get(url).json()['count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delete()
+        data = self.client.get(url).json()
+        self.assertEqual((data['count'], data['results']), (0, []))
+
+
+@override_settings(DELTA_SETTLE_SECONDS=0)
+class DeltaApiTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.records = [PropertyRecord.objects.create(final_market_name=f'Market {i}') for i in range(5)]
+        cls.user = User.objects.create_user('viewer')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def changes(self, since=None, page_size=2):
+        params = {'page_size': page_size, **({'since': since} if since else {})}
+        response = self.client.get(reverse('api_property_changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def sync_all(self, since=None):
+        updated, deleted = [], []
+        while True:
+            data = self.changes(since)
+            updated += [record['id'] for record in data['updated']]
+            deleted += data['deleted']
+            since = data['since']
+            if not data['has_more']:
+                return updated, deleted, since
+
+    def test_initial_download_pages_through_everything(self):
+        first = self.changes()
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(first['updated']), 2)
+        updated, deleted, _ = self.sync_all()
+        self.assertEqual(updated, [record.pk for record in self.records])
+        self.assertEqual(deleted, [])
+
+    def test_edits_and_deletes_since_watermark(self):
+        _, _, since = self.sync_all()
+        self.assertEqual(self.sync_all(since)[:2], ([], []))
+
+        edited, removed = self.records[1], self.records[3]
+        edited.remarks = "Call back"
+        edited.save()
+        removed_id = removed.pk
+        removed.delete()
+
+        updated, deleted, since = self.sync_all(since)
+        self.assertEqual(updated, [edited.pk])
+        self.assertEqual(deleted, [removed_id])
+        self.assertEqual(self.sync_all(since)[:2], ([], []))
+
+    def test_bad_watermark(self):
+        response = self.client.get(reverse('api_property_changes'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DeltaSettleTests(CacheIsolatedTestCase):
+    def test_recent_writes_are_held_back_past_the_busy_timeout(self):
+        busy_timeout = settings.DATABASES['default']['OPTIONS']['timeout']
+        self.assertGreaterEqual(settings.DELTA_SETTLE_SECONDS, busy_timeout)
+
+        now = timezone.now()
+        settled, waiting = (PropertyRecord.objects.create(final_market_name=name) for name in ('Settled', 'Waiting'))
+        # Stamped just before a writer that then waited out the whole busy timeout for the lock
+        PropertyRecord.objects.filter(pk=waiting.pk).update(
+            updated_at=now - datetime.timedelta(seconds=busy_timeout - 1))
+        PropertyRecord.objects.filter(pk=settled.pk).update(
+            updated_at=now - datetime.timedelta(seconds=settings.DELTA_SETTLE_SECONDS + 1))
+
+        updated, _, _, has_more = changes_since(None, 10)
+        self.assertEqual(([record.pk for record in updated], has_more), ([settled.pk], False))
+
+
+class SearchIndexTests(CacheIsolatedTestCase):
+    def matches(self, text):
+        return set(search_records(PropertyRecord.objects.all(), text).values_list('pk', flat=True))
+
+    def test_index_follows_saves_and_deletes(self):
+        record = PropertyRecord.objects.create(final_market_name='Zebra Crossing', hub='North Hub')
+        self.assertEqual(self.matches('zebra'), {record.pk})
+        self.assertEqual(self.matches('zeb cross'), {record.pk})
+
+        record.final_market_name = 'Yak Lane'
+        record.save()
+        self.assertEqual(self.matches('zebra'), set())
+        self.assertEqual(self.matches('yak'), {record.pk})
+
+        record.delete()
+        self.assertEqual(self.matches('yak'), set())
+
+    def test_cursor_pages_by_relevance(self):
+        for i in range(11):
+            PropertyRecord.objects.create(final_market_name=f'Market {i % 3}', remarks='market' if i % 2 else '')
+        queryset = filter_records(PropertyRecord.objects.all(), QueryDict('q=market'))
+        expected = list(order_records(queryset, 'relevance').values_list('pk', flat=True))
+        ids, cursor = [], None
+        while True:
+            page = paginate_keyset(queryset, 'relevance', cursor, 3)
+            ids += [record.pk for record in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(expected), 11)
+
+
+class EditRecordTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.record = PropertyRecord.objects.create(final_market_name='Market 1', zone_name='North', status='pending')
+        cls.user = User.objects.create_user('editor')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.url = reverse('edit_record', args=[self.record.pk])
+
+    def edit(self, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, data)
+
+    def test_updates_remarks_and_status(self):
+        response = self.edit({'remarks': '  Call the landlord  ', 'status': 'Hold'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['id'], data['remarks'], data['status']), (self.record.pk, 'Call the landlord', 'Hold'))
+        self.assertIn('Call the landlord', data['row'])
+        self.record.refresh_from_db()
+        self.assertEqual((self.record.remarks, self.record.status), ('Call the landlord', 'Hold'))
+        self.assertIsNotNone(self.record.status_edited_at)
+
+    def test_remarks_only_leaves_status_alone(self):
+        self.assertEqual(self.edit({'remarks': 'Later', 'status': ''}).status_code, 200)
+        self.record.refresh_from_db()
+        self.assertEqual((self.record.remarks, self.record.status), ('Later', 'pending'))
+        self.assertIsNone(self.record.status_edited_at)
+
+    def test_rejects_unknown_status_and_empty_posts(self):
+        response = self.edit({'status': 'Maybe'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json()['errors'])
+        self.assertEqual(self.edit({}).status_code, 400)
+        self.record.refresh_from_db()
+        self.assertEqual(self.record.status, 'pending')
+
+    def test_post_only_with_csrf_token_and_login(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.force_login(self.user)
+        self.assertEqual(csrf_client.post(self.url, {'remarks': 'x'}).status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.client.post(self.url, {'remarks': 'x'}).status_code, 302)
+        self.record.refresh_from_db()
+        self.assertIsNone(self.record.remarks)
+
+    def test_status_edit_refreshes_facets_and_data_version(self):
+        self.assertEqual(get_facets()['statuses'], [('pending', 1)])
+        version = data_version()
+        self.edit({'status': 'Approved'})
+        self.assertEqual(get_facets()['statuses'], [('Approved', 1)])
+        self.assertEqual(data_version(), version + 1)
+
+    def test_remarks_edit_keeps_facets_but_bumps_data_version(self):
+        get_facets()
+        version = data_version()
+        self.edit({'remarks': 'Later'})
+        self.assertIsNotNone(cache.get(FACETS_CACHE_KEY))
+        self.assertEqual(data_version(), version + 1)
+
+
+class FacetTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            PropertyRecord.objects.create(final_market_name=f'Market {i}', zone_name='North' if i % 2 else 'South',
+                                          status='Approved' if i < 2 else 'pending')
+        PropertyRecord.objects.create(final_market_name='No zone yet', zone_name=None, status='Hold')
+        cls.user = User.objects.create_user('editor')
+
+    def test_counts_are_computed_once_and_cached(self):
+        with self.assertNumQueries(2):
+            facets = get_facets()
+        self.assertEqual(facets, {'zones': [('North', 2), ('South', 3)],
+                                  'statuses': [('Approved', 2), ('Hold', 1), ('pending', 3)]})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facets(), facets)
+
+        # Queryset updates skip the signals, so only the cached counts are seen
+        PropertyRecord.objects.filter(zone_name='South').update(zone_name='East')
+        self.assertEqual(get_facets(), facets)
+
+    def test_dashboard_dropdowns_come_from_the_cache(self):
+        self.client.force_login(self.user)
+        get_facets()
+        PropertyRecord.objects.filter(zone_name='South').update(zone_name='East')
+        response = self.client.get(reverse('property_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['zones'], [('North', 2), ('South', 3)])
+
+    def test_edit_record_save_invalidates_counts(self):
+        get_facets()
+        record = PropertyRecord.objects.filter(status='pending').first()
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(reverse('edit_record', args=[record.pk]), {'status': 'Hold'}).status_code, 200)
+        self.assertIsNone(cache.get(FACETS_CACHE_KEY))
+        self.assertEqual(get_facets()['statuses'], [('Approved', 2), ('Hold', 2), ('pending', 2)])
+
+
+class DashboardPageCacheTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.record = PropertyRecord.objects.create(final_market_name='Market 1', zone_name='North')
+        cls.user = User.objects.create_user('viewer')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        patch = mock.patch('property.views.render_to_string', wraps=render_to_string)
+        self.render = patch.start()
+        self.addCleanup(patch.stop)
+
+    def renders_after(self, change):
+        """Views the dashboard, makes ``change`` and views it again; returns the second page and whether it was rendered."""
+        url = reverse('property_dashboard')
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(self.page_renders(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        response = self.client.get(url)
+        return response, self.page_renders() == 2
+
+    def page_renders(self):
+        # edit_record renders its own row through the same function
+        return sum(call.args[0] == 'property/_dashboard_results.html' for call in self.render.call_args_list)
+
+    def test_unchanged_data_is_served_from_the_cache(self):
+        response, rendered = self.renders_after(lambda: PropertyRecord.objects.update(final_market_name='Unseen'))
+        # Queryset updates skip the signals and leave the version alone
+        self.assertFalse(rendered)
+        self.assertContains(response, 'Market 1')
+
+    def test_signal_bump_misses_the_cache(self):
+        response, rendered = self.renders_after(lambda: PropertyRecord.objects.create(final_market_name='Market 2'))
+        self.assertTrue(rendered)
+        self.assertContains(response, 'Market 2')
+
+    def test_edit_bump_misses_the_cache(self):
+        url = reverse('edit_record', args=[self.record.pk])
+        response, rendered = self.renders_after(lambda: self.client.post(url, {'remarks': 'Call the landlord'}))
+        self.assertTrue(rendered)
+        self.assertContains(response, 'Call the landlord')
+
+    def test_publish_bump_misses_the_cache(self):
+        def sync():
+            # sync_drive writes in bulk, without signals, then publishes
+            PropertyRecord.objects.update(final_market_name='Synced market')
+            sync_drive.Command(stdout=io.StringIO()).publish([], {}, [])
+
+        response, rendered = self.renders_after(sync)
+        self.assertTrue(rendered)
+        self.assertContains(response, 'Synced market')
+
+
+class ExportTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(30):
+            PropertyRecord.objects.create(
+                final_market_name=f'Market {i}', zone_name='North' if i % 3 else 'South', status='Approved',
+                projected_revenue_lakhs='N/A' if i % 5 == 0 else f'{i}.5',
+                projected_revenue_value=None if i % 5 == 0 else Decimal(f'{i}.5'), slide_text='Deck text')
+        cls.user = User.objects.create_user('viewer')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def chunks(self, response):
+        self.assertTrue(response.streaming)
+        return [chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in response.streaming_content]
+
+    def test_csv_streams_the_filtered_rows(self):
+        # Small writes, so the body has to arrive in several chunks
+        with mock.patch('property.views.buffered', lambda pieces: buffered(pieces, size=256)):
+            response = self.client.get(reverse('property_dashboard_export'), {'zone': 'North'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="property-approvals-.*\.csv"$')
+        chunks = self.chunks(response)
+        self.assertGreater(len(chunks), 2)
+
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8-sig'))))
+        self.assertEqual(rows[0][:2], ['Presentation Date', 'Zone'])
+        self.assertEqual(len(rows), 1 + 20)
+        self.assertEqual({row[1] for row in rows[1:]}, {'North'})
+        # The raw slide value stands in where the numeric copy is NULL
+        self.assertIn('N/A', {row[8] for row in rows[1:]})
+
+    def test_xlsx_streams_from_a_temporary_file(self):
+        response = self.client.get(reverse('property_dashboard_export'), {'format': 'xlsx', 'zone': 'South'})
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Type'],
+                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="property-approvals-.*\.xlsx"$')
+        self.assertNotIsInstance(response.file_to_stream, io.BytesIO)
+        chunks = self.chunks(response)
+        self.assertGreater(len(chunks), 1)
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as workbook:
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row '), 1 + 10)
+
+    def test_ndjson_streams_one_record_per_line(self):
+        with mock.patch('property.views.buffered', lambda pieces: buffered(pieces, size=256)):
+            response = self.client.get(reverse('api_property_export'), {'zone': 'North', 'sort': 'revenue_desc'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        chunks = self.chunks(response)
+        self.assertGreater(len(chunks), 2)
+
+        records = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual(len(records), 20)
+        self.assertEqual({record['zone_name'] for record in records}, {'North'})
+        self.assertNotIn('slide_text', records[0])
+
+    async def test_exports_stream_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for params in ({'zone': 'North'}, {'format': 'xlsx', 'zone': 'North'}):
+            with self.subTest(**params):
+                response = await self.async_client.get(reverse('property_dashboard_export'), params)
+                self.assertTrue(response.is_async)
+                body = b''.join([chunk async for chunk in response.streaming_content])
+                self.assertTrue(body)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"results": [' + b', '.join(b'{"id": %d, "status": "Approved"}' % i for i in range(200)) + b']}'
+
+    def respond(self, accept_encoding, response):
+        request = RequestFactory().get('/', headers={'accept-encoding': accept_encoding})
+        return middleware.CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self):
+        return HttpResponse(self.body, content_type='application/json')
+
+    def test_negotiates_the_preferred_encoding(self):
+        decoders = {'gzip': gzip.decompress}
+        if middleware.zstandard is not None:
+            decoders['zstd'] = lambda data: middleware.zstandard.ZstdDecompressor().decompress(data)
+        if middleware.brotli is not None:
+            decoders['br'] = middleware.brotli.decompress
+        cases = [('gzip, deflate', 'gzip'), ('zstd;q=0, gzip', 'gzip')]
+        if middleware.brotli is not None:
+            cases += [('gzip, br', 'br'), ('br;q=0.5, gzip', 'br'), ('zstd;q=0, br, gzip', 'br')]
+        if middleware.zstandard is not None:
+            cases += [('gzip, br, zstd', 'zstd')]
+        for accept_encoding, expected in cases:
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.respond(accept_encoding, self.json_response())
+                self.assertEqual(response['Content-Encoding'], expected)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertEqual(int(response['Content-Length']), len(response.content))
+                self.assertEqual(decoders[expected](response.content), self.body)
+
+        response = self.respond('identity', self.json_response())
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, self.body)
+
+    def test_skips_already_compressed_types(self):
+        for content_type in ['image/png', 'image/jpeg', 'application/zip', 'application/pdf',
+                             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet']:
+            with self.subTest(content_type=content_type):
+                response = self.respond('gzip, br, zstd', HttpResponse(self.body, content_type=content_type))
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, self.body)
+        svg = self.respond('gzip', HttpResponse(self.body, content_type='image/svg+xml'))
+        self.assertEqual(svg['Content-Encoding'], 'gzip')
+
+    @skipUnless(middleware.ENCODERS, "needs brotli or zstandard")
+    def test_streaming_responses_are_compressed_chunk_by_chunk(self):
+        encoding = next(iter(middleware.ENCODERS))
+        pieces = [self.body[i:i + 500] for i in range(0, len(self.body), 500)]
+        response = self.respond(encoding, StreamingHttpResponse(iter(pieces), content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertFalse(response.has_header('Content-Length'))
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), len(pieces) // 2)
+        if encoding == 'zstd':
+            data = middleware.zstandard.ZstdDecompressor().decompressobj().decompress(b''.join(chunks))
+        else:
+            data = middleware.brotli.decompress(b''.join(chunks))
+        self.assertEqual(data, self.body)
+
+    def test_weakens_the_etag_of_compressed_responses(self):
+        response = self.json_response()
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.respond('gzip, br, zstd', response)['ETag'], 'W/"abc"')
+
+
+class CompressedConditionalGetTests(CacheIsolatedTestCase):
+    def test_compressed_record_list_revalidates_to_304(self):
+        PropertyRecord.objects.create(final_market_name='Market 1')
+        self.client.force_login(User.objects.create_user('viewer'))
+        url = reverse('api_property_list')
+        encodings = 'gzip, br, zstd'
+
+        response = self.client.get(url, headers={'accept-encoding': encodings})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('Content-Encoding'))
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get(url, headers={'accept-encoding': encodings, 'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+
+class ApprovalSummaryTests(CacheIsolatedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        zones, statuses = ['North', 'South', None], list(STATUS_COLUMNS) + ['Other']
+        for i in range(24):
+            PropertyRecord.objects.create(
+                zone_name=zones[i % 3], circle=f'Circle {i % 2}', hub=None if i % 4 == 0 else 'Hub',
+                presentation_date=None if i % 7 == 0 else datetime.date(2025, 1 + i % 3, 1 + i),
+                status=statuses[i % len(statuses)],
+                projected_revenue_value=None if i % 5 == 0 else Decimal(f'{i}.25'),
+                total_rent_value=Decimal(1000 * i))
+        rebuild_summary()
+
+    def summary(self):
+        fields = [field.name for field in ApprovalSummary._meta.concrete_fields if field.name != 'id']
+        return sorted(ApprovalSummary.objects.values_list(*fields), key=repr)
+
+    def test_refreshing_edited_groups_matches_a_full_rebuild(self):
+        records = list(PropertyRecord.objects.order_by('pk'))
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = records[1]
+            moved.zone_name, moved.presentation_date, moved.status = 'East', datetime.date(2025, 6, 3), 'Approved'
+            moved.save()
+            records[2].projected_revenue_value = Decimal('99.99')
+            records[2].save(update_fields=['projected_revenue_value', 'updated_at'])
+            records[3].delete()
+            PropertyRecord.objects.create(zone_name='North', circle='Circle 0', hub='Hub', status='Hold',
+                                          presentation_date=datetime.date(2025, 1, 9))
+        # Bulk updates skip signals, so their groups are refreshed by hand
+        target = records[4]
+        PropertyRecord.objects.filter(pk=target.pk).update(status='Dropped/Rejected')
+        refresh_groups([group_of(target)])
+
+        refreshed = self.summary()
+        rebuild_summary()
+        self.assertEqual(refreshed, self.summary())
+        self.assertIn('East', {row[0] for row in refreshed})
+
+    def test_api_rolls_up_and_rejects_unknown_breakdowns(self):
+        self.client.force_login(User.objects.create_user('viewer'))
+        url = reverse('api_analytics')
+        data = self.client.get(url, {'by': 'month', 'zone': 'North'}).json()
+        self.assertEqual(data['by'], 'month')
+        self.assertEqual(sum(row['records'] for row in data['results']),
+                         PropertyRecord.objects.filter(zone_name='North').count())
+
+        response = self.client.get(url, {'by': 'planet'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('by must be one of', response.json()['detail'])
+
+
+# --- Slide thumbnails ---
+class FakeThumbnailDrive:
+    """Stands in for DriveClient: serves ``images`` (file ID -> bytes) and counts metadata lookups."""
+
+    def __init__(self, images, gate=None):
+        self.images, self.gate, self.lookups = images, gate, []
+
+    def get_file(self, file_id, fields):
+        self.lookups.append(file_id)
+        if self.gate is not None:
+            self.gate.wait(5)
+        return {'thumbnailLink': f'https://lh3.example.com/{file_id}=s220'} if file_id in self.images else {}
+
+    def fetch(self, url):
+        return self.images[url.rsplit('/', 1)[1].split('=')[0]]
+
+
+class ThumbnailTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.thumbnail_cache = ThumbnailCache(self.directory, 10 ** 6, 10 ** 6, no_preview_seconds=60)
+        for patch in (mock.patch.object(thumbnails, '_cache', self.thumbnail_cache),
+                      mock.patch.dict(thumbnails._inflight, clear=True),
+                      mock.patch.dict(thumbnails._fetch_stats, {'upstream_fetches': 0, 'coalesced_requests': 0})):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+
+class ThumbnailCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def path(self, file_id, suffix='.img'):
+        return os.path.join(self.directory, file_id + suffix)
+
+    def test_memory_tier_evicts_least_recently_used_by_bytes(self):
+        cache = ThumbnailCache(self.directory, 10 ** 6, 250)
+        cache.set('a', b'a' * 100)
+        cache.set('b', b'b' * 100)
+        cache.get('a')
+        cache.set('c', b'c' * 100)  # 300 bytes: b, the least recently used, has to go
+        stats = cache.stats()
+        self.assertEqual((stats['memory_entries'], stats['memory_bytes']), (2, 200))
+
+        self.assertEqual(cache.get('a'), (b'a' * 100, make_etag(b'a' * 100)))
+        self.assertEqual(cache.stats()['disk_hits'], 0)
+        self.assertEqual(cache.get('b')[0], b'b' * 100)  # Still on disk
+        self.assertEqual(cache.stats()['disk_hits'], 1)
+
+    def test_disk_tier_evicts_least_recently_used_files_by_bytes(self):
+        cache = ThumbnailCache(self.directory, 250, 0)
+        cache.set('a', b'a' * 100, version='v1')
+        cache.set('b', b'b' * 100, version='v1')
+        os.utime(self.path('a'), (1, 1))
+        os.utime(self.path('b'), (2, 2))
+        cache.get('a')  # Read from disk, which makes it the most recent
+
+        cache.set('c', b'c' * 100)
+        self.assertTrue(os.path.exists(self.path('a')))
+        self.assertFalse(os.path.exists(self.path('b')))
+        self.assertFalse(os.path.exists(self.path('b', '.version')))
+        self.assertEqual(cache.stats()['disk_bytes'], 200)
+        self.assertIsNone(cache.get('b'))
+
+    def test_file_replaced_by_another_process_is_not_served_stale(self):
+        web = ThumbnailCache(self.directory, 10 ** 6, 10 ** 6)
+        web.set('deck', b'old')
+        self.assertEqual(web.get('deck')[0], b'old')
+        self.assertEqual(web.stats()['memory_hits'], 1)
+
+        # sync_drive re-warms the file from its own process and cache instance
+        ThumbnailCache(self.directory, 10 ** 6, 10 ** 6).set('deck', b'new', version='2025-03-01T00:00:00Z')
+        self.assertEqual(web.get('deck'), (b'new', make_etag(b'new')))
+        self.assertEqual(web.stats()['disk_hits'], 1)
+        self.assertEqual(web.get_version('deck'), '2025-03-01T00:00:00Z')
+
+        os.remove(self.path('deck'))
+        self.assertIsNone(web.get_version('deck'))
+
+
+class SlideProxyTests(ThumbnailTestMixin, CacheIsolatedTestCase):
+    file_id = 'slide' + 'x' * 30
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('viewer'))
+        self.url = reverse('slide_proxy') + f'?url=https://docs.google.com/presentation/d/{self.file_id}/edit'
+
+    def test_no_preview_answer_is_cached(self):
+        drive = FakeThumbnailDrive({})
+        with mock.patch('property.views.get_drive_client', return_value=drive):
+            for _ in range(3):
+                response = self.client.get(self.url)
+                self.assertRedirects(response, NO_PREVIEW_URL, fetch_redirect_response=False)
+        self.assertEqual(drive.lookups, [self.file_id])
+        self.assertEqual(self.thumbnail_cache.stats()['no_preview_hits'], 2)
+
+        # A preview stored later (e.g. by sync_drive) replaces the cached "none"
+        self.thumbnail_cache.set(self.file_id, b'png')
+        self.assertFalse(self.thumbnail_cache.has_no_preview(self.file_id))
+        self.assertEqual(self.client.get(self.url).content, b'png')
+
+    def test_miss_then_hit_then_not_modified(self):
+        drive = FakeThumbnailDrive({self.file_id: b'\x89PNG slide'})
+        with mock.patch('property.views.get_drive_client', return_value=drive):
+            miss = self.client.get(self.url)
+            hit = self.client.get(self.url)
+            revalidated = self.client.get(self.url, headers={'if-none-match': hit['ETag']})
+
+        self.assertEqual((miss.status_code, miss['X-Thumbnail-Cache'], miss.content), (200, 'MISS', b'\x89PNG slide'))
+        self.assertEqual(miss['Content-Type'], 'image/png')
+        self.assertFalse(miss.has_header('Content-Encoding'))
+        self.assertEqual((hit.status_code, hit['X-Thumbnail-Cache']), (200, 'HIT'))
+        self.assertEqual(hit['ETag'], miss['ETag'])
+        self.assertEqual((revalidated.status_code, revalidated.content), (304, b''))
+        self.assertEqual(drive.lookups, [self.file_id])
+
+    def test_concurrent_misses_share_one_upstream_fetch(self):
+        gate = threading.Event()
+        drive = FakeThumbnailDrive({self.file_id: b'png'}, gate=gate)
+        futures = [thumbnails.fetch_thumbnail(drive, self.file_id) for _ in range(5)]
+        self.assertEqual(len({id(future) for future in futures}), 1)
+        gate.set()
+
+        self.assertEqual(futures[0].result(timeout=5), (b'png', make_etag(b'png')))
+        self.assertEqual(drive.lookups, [self.file_id])
+        self.assertEqual(thumbnails.fetch_stats(), {'upstream_fetches': 1, 'coalesced_requests': 4,
+                                                    'upstream_in_flight': 0})
+        # Once settled, the next miss goes upstream again rather than reusing the old future
+        thumbnails.fetch_thumbnail(drive, self.file_id).result(timeout=5)
+        self.assertEqual(len(drive.lookups), 2)
+
+    async def test_concurrent_proxy_requests_share_one_upstream_fetch(self):
+        gate = threading.Event()
+        drive = FakeThumbnailDrive({self.file_id: b'png'}, gate=gate)
+        await self.async_client.aforce_login(await User.objects.aget(username='viewer'))
+        with mock.patch('property.views.get_drive_client', return_value=drive):
+            requests = [asyncio.ensure_future(self.async_client.get(self.url)) for _ in range(4)]
+            for _ in range(200):  # Until the other three have joined the first one's fetch
+                if thumbnails.fetch_stats()['coalesced_requests'] == 3:
+                    break
+                await asyncio.sleep(0.01)
+            gate.set()
+            responses = await asyncio.gather(*requests)
+
+        self.assertEqual({(response.status_code, response.content) for response in responses}, {(200, b'png')})
+        self.assertEqual(drive.lookups, [self.file_id])
+
+
+class DownloadStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.contents = {}
+        self.drive = mock.Mock()
+        files = self.drive.service.files.return_value
+        files.get_media.side_effect = lambda fileId: fileId
+        files.export_media.side_effect = lambda fileId, mimeType: fileId
+        self.drive.download.side_effect = lambda request, fh: fh.write(self.contents[request])
+
+    def meta(self, file_id, md5=None, modified='2025-01-01T00:00:00Z', mime_type='application/pdf'):
+        return {'id': file_id, 'mimeType': mime_type, 'md5Checksum': md5, 'modifiedTime': modified}
+
+    def stored(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_hit_never_calls_drive(self):
+        store = DownloadStore(self.directory, 10 ** 6)
+        self.contents['deck'] = b'v1'
+        path = store.fetch(self.drive, self.meta('deck', md5='aaa'), '.pptx')
+        self.drive.reset_mock()
+
+        self.assertEqual(store.fetch(self.drive, self.meta('deck', md5='aaa'), '.pptx'), path)
+        self.assertEqual(self.drive.mock_calls, [])
+        self.assertEqual((store.hits, store.downloads), (1, 1))
+
+    def test_new_checksum_is_a_new_entry_and_replaces_the_old_one(self):
+        store = DownloadStore(self.directory, 10 ** 6)
+        self.contents['deck'] = b'v1'
+        old = store.fetch(self.drive, self.meta('deck', md5='aaa'), '.pptx')
+        self.contents['deck'] = b'v2'
+        new = store.fetch(self.drive, self.meta('deck', md5='bbb'), '.pptx')
+
+        self.assertNotEqual(old, new)
+        self.assertEqual(self.stored(), ['deck-bbb.pptx'])
+        with open(new, 'rb') as f:
+            self.assertEqual(f.read(), b'v2')
+        self.assertEqual(store.downloads, 2)
+
+    def test_native_slides_are_keyed_on_modified_time(self):
+        store = DownloadStore(self.directory, 10 ** 6)
+        self.contents['slides'] = b'pptx'
+        slides = self.meta('slides', mime_type=SLIDES_MIME_TYPE)
+        first = store.fetch(self.drive, slides, '.pptx')
+        self.drive.service.files.return_value.export_media.assert_called_once_with(
+            fileId='slides', mimeType=PPTX_MIME_TYPE)
+        self.assertEqual(store.fetch(self.drive, slides, '.pptx'), first)
+        self.assertNotEqual(store.fetch(self.drive, {**slides, 'modifiedTime': '2025-02-01T00:00:00Z'}, '.pptx'), first)
+
+    def test_evicts_least_recently_used_entries_to_stay_under_the_cap(self):
+        store = DownloadStore(self.directory, 250)
+        for file_id in 'ab':
+            self.contents[file_id] = file_id.encode() * 100
+            store.fetch(self.drive, self.meta(file_id, md5='1'), '.pdf')
+        os.utime(os.path.join(self.directory, 'a-1.pdf'), (1, 1))
+        os.utime(os.path.join(self.directory, 'b-1.pdf'), (2, 2))
+        store.fetch(self.drive, self.meta('a', md5='1'), '.pdf')  # A hit makes a the most recent
+
+        self.contents['c'] = b'c' * 100
+        store.fetch(self.drive, self.meta('c', md5='1'), '.pdf')
+        self.assertEqual(self.stored(), ['a-1.pdf', 'c-1.pdf'])
+        self.assertLessEqual(sum(os.path.getsize(os.path.join(self.directory, name)) for name in self.stored()), 250)
+
+    def test_failed_download_leaves_nothing_behind(self):
+        store = DownloadStore(self.directory, 10 ** 6)
+        self.drive.download.side_effect = OSError("connection reset")
+        with self.assertRaises(OSError):
+            store.fetch(self.drive, self.meta('deck', md5='aaa'), '.pptx')
+        self.assertEqual(self.stored(), [])
+
+
+# --- sync_drive ---
+DECK = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+
+def drive_listing(folders=3, modified='2025-02-01T00:00:00Z'):
+    """A Drive listing: one dated folder holding a folder with a deck and AI summary per market."""
+    items = [{'id': 'dated', 'name': '25 Jan 2025', 'mimeType': 'application/vnd.google-apps.folder',
+              'parents': ['root']}]
+    for i in range(folders):
+        items += [
+            {'id': f'market-{i}', 'name': f'Market {i}', 'mimeType': 'application/vnd.google-apps.folder',
+             'parents': ['dated']},
+            {'id': f'deck-{i}', 'name': 'deck.pptx', 'mimeType': DECK, 'parents': [f'market-{i}'],
+             'webViewLink': f'https://docs.google.com/presentation/d/deck-{i}/edit', 'modifiedTime': modified,
+             'md5Checksum': f'deck-{i}'},
+            {'id': f'summary-{i}', 'name': 'ai_summary.pdf', 'mimeType': 'application/pdf',
+             'parents': [f'market-{i}'], 'webViewLink': f'https://drive.google.com/file/d/summary-{i}',
+             'modifiedTime': modified, 'md5Checksum': f'summary-{i}'},
+        ]
+    return items
+
+
+def parsed_folder(pptx_path, pdf_path=None):
+    return {'property_id': None, 'ppt_info': {'zone_name': 'North', 'revenue': '12.5', 'revenue_value': Decimal('12.5')},
+            'status': 'Approved', 'pdf_seconds': None, 'slide_text': 'Deck text'}
+
+
+class SyncDriveTests(CacheIsolatedTestCase):
+    """sync_drive against a stub Drive: files are never downloaded and "parsing" returns a fixed result."""
+
+    def setUp(self):
+        super().setUp()
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        overrides = override_settings(DRIVE_DOWNLOAD_DIR=workdir, THUMBNAIL_CACHE_DIR=workdir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        patches = [
+            mock.patch.object(sync_drive.Command, 'authenticate'),
+            mock.patch.object(sync_drive, 'DriveClient'),
+            mock.patch.object(sync_drive.Command, 'fetch_folder',
+                              return_value={'pptx_path': 'deck.pptx', 'pdf_path': 'summary.pdf'}),
+            # Threads instead of processes, so the parse stub is shared and counts its calls
+            mock.patch.object(sync_drive, 'ProcessPoolExecutor',
+                              lambda max_workers, mp_context: ThreadPoolExecutor(max_workers)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        patch = mock.patch.object(sync_drive, 'parse_folder_files', side_effect=parsed_folder)
+        self.parse = patch.start()
+        self.addCleanup(patch.stop)
+
+    def sync(self, listing, **options):
+        out = io.StringIO()
+        with mock.patch.object(sync_drive.Command, 'get_all_files', return_value=listing):
+            call_command('sync_drive', stdout=out, **options)
+        return out.getvalue()
+
+    def test_first_sync_saves_every_folder(self):
+        output = self.sync(drive_listing())
+        self.assertIn("Sync complete: 3 saved", output)
+        self.assertEqual(self.parse.call_count, 3)
+        record = PropertyRecord.objects.get(drive_folder_id='market-0')
+        self.assertEqual((record.presentation_date, record.status, record.zone_name),
+                         (datetime.date(2025, 1, 25), 'Approved', 'North'))
+
+    def test_unchanged_resync_parses_nothing(self):
+        self.sync(drive_listing())
+        before = dict(PropertyRecord.objects.values_list('drive_folder_id', 'updated_at'))
+        self.parse.reset_mock()
+
+        output = self.sync(drive_listing())
+        self.assertIn("0 saved, 0 resumed, 3 unchanged, 0 removed", output)
+        self.parse.assert_not_called()
+        self.assertEqual(dict(PropertyRecord.objects.values_list('drive_folder_id', 'updated_at')), before)
+
+    def test_changed_and_removed_folders(self):
+        self.sync(drive_listing())
+        self.parse.reset_mock()
+
+        listing = drive_listing(folders=2)
+        listing[2]['modifiedTime'] = '2025-03-01T00:00:00Z'  # market-0's deck
+        output = self.sync(listing)
+        self.assertIn("1 saved, 0 resumed, 1 unchanged, 1 removed", output)
+        self.assertEqual(self.parse.call_count, 1)
+        self.assertEqual(set(PropertyRecord.objects.values_list('drive_folder_id', flat=True)),
+                         {'market-0', 'market-1'})
+
+    def test_renamed_date_folder_resyncs_its_markets(self):
+        self.sync(drive_listing())
+        self.parse.reset_mock()
+
+        listing = drive_listing()
+        listing[0]['name'] = '1 Feb 2025'
+        output = self.sync(listing)
+        self.assertIn("3 saved, 0 resumed, 0 unchanged, 0 removed", output)
+        self.assertEqual(set(PropertyRecord.objects.values_list('presentation_date', flat=True)),
+                         {datetime.date(2025, 2, 1)})
+
+    def test_resync_keeps_a_status_edited_in_the_dashboard(self):
+        self.sync(drive_listing())
+        edited, untouched = PropertyRecord.objects.get(drive_folder_id='market-0'), 'market-1'
+        self.client.force_login(User.objects.create_user('editor'))
+        response = self.client.post(reverse('edit_record', args=[edited.pk]), {'status': 'Hold'})
+        self.assertEqual(response.status_code, 200)
+        # Not an edit from the dashboard, so the re-sync should put the parsed status back
+        PropertyRecord.objects.filter(drive_folder_id=untouched).update(status='pending')
+
+        listing = drive_listing()
+        for item in listing:
+            if item['id'] in ('deck-0', 'deck-1'):
+                item['modifiedTime'] = '2025-03-01T00:00:00Z'
+        with mock.patch.object(sync_drive, 'parse_folder_files',
+                               side_effect=lambda *args: {**parsed_folder(*args), 'slide_text': 'New text'}):
+            self.assertIn("2 saved", self.sync(listing))
+
+        edited.refresh_from_db()
+        self.assertEqual((edited.status, edited.slide_text), ('Hold', 'New text'))
+        self.assertEqual(PropertyRecord.objects.get(drive_folder_id=untouched).status, 'Approved')
+
+    def test_publish_invalidates_facet_counts(self):
+        self.sync(drive_listing())
+        self.assertEqual(get_facets()['zones'], [('North', 3)])
+
+        listing = drive_listing()
+        listing[2]['modifiedTime'] = '2025-03-01T00:00:00Z'  # market-0's deck
+        with mock.patch.object(sync_drive, 'parse_folder_files',
+                               side_effect=lambda *args: {**parsed_folder(*args), 'ppt_info': {'zone_name': 'South'}}):
+            self.sync(listing)
+        self.assertEqual(get_facets()['zones'], [('North', 2), ('South', 1)])
+
+    def test_successful_run_closes_its_job(self):
+        self.sync(drive_listing())
+        job = SyncJob.objects.get()
+        self.assertEqual((job.status, job.processed_folders), (SyncJob.SUCCEEDED, 3))
+        self.assertFalse(SyncCheckpoint.objects.exists())
+
+    def test_failed_run_resumes_from_checkpoints(self):
+        with mock.patch.object(sync_drive.Command, 'publish', side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                self.sync(drive_listing())
+        job = SyncJob.objects.get()
+        self.assertEqual((job.status, job.processed_folders), (SyncJob.FAILED, 3))
+        self.assertEqual(job.checkpoints.count(), 3)
+        self.assertFalse(PropertyRecord.objects.exists())
+        self.parse.reset_mock()
+
+        output = self.sync(drive_listing())
+        self.assertIn("Resumed 3 folders from checkpoints", output)
+        self.parse.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (SyncJob.SUCCEEDED, 2))
+        self.assertFalse(SyncCheckpoint.objects.exists())
+        self.assertEqual(PropertyRecord.objects.filter(status='Approved').count(), 3)
+
+    def test_skips_while_another_run_holds_the_lock(self):
+        running = start_job()
+        output = self.sync(drive_listing())
+        self.assertIn(f"Sync job #{running.pk} is already running", output)
+        self.parse.assert_not_called()
+        self.assertEqual(SyncJob.objects.count(), 1)
@@ -0,0 +1,266 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import LRUCache, TTLCache
+from django.conf import settings
+
+
+def make_etag(content):
+    return '"%s"' % hashlib.md5(content).hexdigest()
+
+
+class ThumbnailCache:
+    """
+    Two-tier cache for slide thumbnails, keyed by Drive file ID.
+
+    Tier 1 is an in-process LRU bounded by total bytes; tier 2 is a directory
+    on disk bounded by total bytes, evicting least recently used files first.
+    The disk tier is shared with ``sync_drive``, which pre-warms it and tags
+    each image with the presentation's ``modifiedTime`` as its version.
+
+    Files Drive has no preview for are remembered for ``no_preview_seconds``,
+    so requests for them do not all go back to Drive.
+    """
+
+    def __init__(self, directory, max_disk_bytes, max_memory_bytes, no_preview_seconds=0):
+        self.directory = str(directory)
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = LRUCache(maxsize=max_memory_bytes, getsizeof=lambda entry: len(entry[0]))
+        self._no_preview = TTLCache(maxsize=10_000, ttl=no_preview_seconds) if no_preview_seconds else None
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # Lazily computed on first write
+
+        # Counters for the stats endpoint
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.no_preview_hits = 0
+        self.bytes_saved = 0
+
+    def _path(self, file_id):
+        return os.path.join(self.directory, f"{file_id}.img")
+
+    def _version_path(self, file_id):
+        return os.path.join(self.directory, f"{file_id}.version")
+
+    def _remember(self, file_id, entry):
+        # Items bigger than the whole memory tier are only kept on disk
+        if len(entry[0]) <= self._memory.maxsize:
+            self._memory[file_id] = entry
+
+    def get(self, file_id):
+        """Returns ``(content, etag)`` or ``None`` on a miss."""
+        path = self._path(file_id)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+
+        with self._lock:
+            entry = self._memory.get(file_id)
+            # The sync command rewrites files from another process; a new
+            # inode means the in-memory copy is stale.
+            if entry is not None and (stat is None or entry[2] == stat.st_ino):
+                self.memory_hits += 1
+                self.bytes_saved += len(entry[0])
+                return entry[:2]
+
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+                ino = os.fstat(f.fileno()).st_ino
+            os.utime(path)  # Bump recency so eviction stays LRU
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        entry = (content, make_etag(content), ino)
+        with self._lock:
+            self._remember(file_id, entry)
+            self.disk_hits += 1
+            self.bytes_saved += len(content)
+        return entry[:2]
+
+    def has_no_preview(self, file_id):
+        """True if Drive recently said the file has no thumbnail."""
+        with self._lock:
+            if self._no_preview is None or file_id not in self._no_preview:
+                return False
+            self.no_preview_hits += 1
+            return True
+
+    def set_no_preview(self, file_id):
+        with self._lock:
+            if self._no_preview is not None:
+                self._no_preview[file_id] = True
+
+    def get_version(self, file_id):
+        """Returns the version tag stored alongside the image, if any."""
+        if not os.path.exists(self._path(file_id)):
+            return None
+        try:
+            with open(self._version_path(file_id)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set(self, file_id, content, version=None):
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write atomically so concurrent readers never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            ino = os.fstat(f.fileno()).st_ino
+        path = self._path(file_id)
+        try:
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+        os.replace(tmp_path, path)
+
+        version_path = self._version_path(file_id)
+        if version:
+            with open(version_path, 'w') as f:
+                f.write(version)
+        elif os.path.exists(version_path):
+            os.remove(version_path)
+
+        entry = (content, make_etag(content), ino)
+        with self._lock:
+            self._remember(file_id, entry)
+            if self._no_preview is not None:
+                self._no_preview.pop(file_id, None)
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[1]
+            else:
+                self._disk_bytes += len(content) - previous_size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+        return entry[:2]
+
+    def _scan_disk(self):
+        files, total = [], 0
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.name.endswith('.img'):
+                        stat = item.stat()
+                        files.append((stat.st_mtime, stat.st_size, item.path))
+                        total += stat.st_size
+        except FileNotFoundError:
+            pass
+        return files, total
+
+    def _evict(self):
+        # Rescan, since other worker processes share the same directory
+        files, total = self._scan_disk()
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+            try:
+                os.remove(path[:-len('.img')] + '.version')
+            except FileNotFoundError:
+                pass
+        self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'no_preview_hits': self.no_preview_hits,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'memory_bytes': self._memory.currsize,
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ThumbnailCache(
+                    settings.THUMBNAIL_CACHE_DIR,
+                    settings.THUMBNAIL_CACHE_MAX_DISK_BYTES,
+                    settings.THUMBNAIL_CACHE_MAX_MEMORY_BYTES,
+                    settings.THUMBNAIL_NO_PREVIEW_SECONDS,
+                )
+    return _cache
+
+
+# --- Upstream fetches ---
+# Misses are fetched on a small dedicated pool, which caps how many Drive
+# requests run at once, and concurrent requests for the same file share one
+# fetch. Futures are concurrent.futures ones, so any event loop (or thread) can wait on them.
+_fetch_executor = None
+_inflight = {}
+_inflight_lock = threading.Lock()
+_fetch_stats = {'upstream_fetches': 0, 'coalesced_requests': 0}
+
+
+def _get_fetch_executor():
+    global _fetch_executor
+    if _fetch_executor is None:
+        with _inflight_lock:
+            if _fetch_executor is None:
+                _fetch_executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_MAX_UPSTREAM_FETCHES,
+                                                     thread_name_prefix='thumbnail-fetch')
+    return _fetch_executor
+
+
+def _download(drive, file_id):
+    file_meta = drive.get_file(file_id, fields='thumbnailLink')
+    thumbnail_url = file_meta.get('thumbnailLink')
+    if not thumbnail_url:
+        get_thumbnail_cache().set_no_preview(file_id)
+        return None
+    high_res_url = thumbnail_url.replace('=s220', '=s1000')
+    return get_thumbnail_cache().set(file_id, drive.fetch(high_res_url))
+
+
+def fetch_thumbnail(drive, file_id):
+    """
+    Fetches a thumbnail missing from the cache and stores it. Returns a
+    Future resolving to ``(content, etag)``, or ``None`` if Drive has no preview.
+    """
+    executor = _get_fetch_executor()
+    with _inflight_lock:
+        future = _inflight.get(file_id)
+        if future is not None:
+            _fetch_stats['coalesced_requests'] += 1
+            return future
+        future = _inflight[file_id] = executor.submit(_download, drive, file_id)
+        _fetch_stats['upstream_fetches'] += 1
+
+    def forget(done):
+        with _inflight_lock:
+            if _inflight.get(file_id) is done:
+                del _inflight[file_id]
+
+    future.add_done_callback(forget)
+    return future
+
+
+def fetch_stats():
+    with _inflight_lock:
+        return {**_fetch_stats, 'upstream_in_flight': len(_inflight)}
@@ -4,11 +4,17 @@ from property import views
 
 urlpatterns = [
     path('dashboard/', views.PropertyDashboardView.as_view(), name='property_dashboard'),
-    path('update-remarks/<int:pk>/', views.update_remarks, name='update_remarks'),
+    path('dashboard/export/', views.PropertyDashboardExportView.as_view(), name='property_dashboard_export'),
+    path('records/<int:pk>/edit/', views.edit_record, name='edit_record'),
     path('slide-proxy/', views.slide_proxy, name='slide_proxy'),
+    path('slide-proxy/stats/', views.slide_proxy_stats, name='slide_proxy_stats'),
+    path('sync/status/', views.sync_status, name='sync_status'),
 
     # --- NEW API PATH FOR ANDROID ---
     path('api/properties/', views.PropertyRecordListAPIView.as_view(), name='api_property_list'),
+    path('api/properties/export/', views.PropertyRecordExportAPIView.as_view(), name='api_property_export'),
+    path('api/properties/changes/', views.PropertyRecordChangesAPIView.as_view(), name='api_property_changes'),
+    path('api/analytics/', views.ApprovalAnalyticsAPIView.as_view(), name='api_analytics'),
 
     path('login/', auth_views.LoginView.as_view(template_name='admin/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
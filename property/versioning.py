@@ -0,0 +1,35 @@
+"""
+A shared counter of record changes, used to key cached dashboard HTML.
+
+sync_drive and every PropertyRecord save or delete bump it, so anything cached
+under an older version is never read again and simply ages out of the cache.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+
+DATA_VERSION_KEY = 'record-data-version'
+
+
+def data_version():
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # Seeded from the clock, so a counter lost to eviction never comes back as a version already used
+        cache.add(DATA_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(DATA_VERSION_KEY, time.time_ns())
+    return version
+
+
+def bump_data_version():
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        return data_version()
+
+
+def versioned_key(prefix, params, version):
+    """Cache key for a page of ``prefix`` with the given query parameters at data ``version``."""
+    query = urlencode(sorted(params.lists()), doseq=True)
+    return f"{prefix}:{version}:{hashlib.md5(query.encode()).hexdigest()}"
@@ -1,98 +1,174 @@
+import asyncio
 import re
-import os
-import requests
+import tempfile
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.views.generic import ListView
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect
-from django.views.decorators.http import require_POST
-from django.contrib import messages
+from django.core import signing
+from django.core.cache import caches
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition, require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
-from rest_framework import generics
-from .serializers import PropertyRecordSerializer
+from rest_framework import generics, status
+from rest_framework.response import Response
+from .analytics import BREAKDOWNS, STATUS_COLUMNS, summarize
+from .delta import changes_since, decode_watermark, record_list_etag, record_list_last_modified
+from .drive import get_drive_client
+from .exports import buffered, iter_csv, iter_ndjson, streamed, write_xlsx
+from .facets import get_facets
+from .filters import SORT_CHOICES, SORT_KEYS, filter_records, order_records, requested_sort
+from .jobs import job_progress, latest_job
+from .pagination import RecordKeysetPagination, cached_count, paginate_keyset, requested_page_size
+from .serializers import INTERNAL_FIELDS, OPT_IN_FIELDS, PropertyRecordSerializer, sparse_fields
+from .thumbnails import fetch_stats, fetch_thumbnail, get_thumbnail_cache
+from .versioning import data_version, versioned_key
 
 # Local models
 from .models import PropertyRecord
 
+FIELD_NAMES = {field.name for field in PropertyRecord._meta.concrete_fields}
+
 
 # --- 1. Dashboard View ---
 class PropertyDashboardView(LoginRequiredMixin, ListView):
     model = PropertyRecord
     template_name = 'property/dashboard.html'
     context_object_name = 'page_obj'
-    paginate_by = 50
+    # Keyset pagination (?cursor=... forward, ?before=... back) instead of ListView's OFFSET paginator
+    per_page = 50
 
     login_url = 'login'
 
+    def get(self, request, *args, **kwargs):
+        # Everything but the flash messages and CSRF token is cached per filters/cursor and
+        # data version, so a repeat view runs no queries and renders only the page shell
+        version = data_version()
+        key = versioned_key('dashboard-page', request.GET, version)
+        page_cache = caches['pages']
+        results = page_cache.get(key)
+        if results is None:
+            self.object_list = self.get_queryset()
+            context = self.get_context_data(data_version=version,
+                                            dashboard_cache_seconds=settings.DASHBOARD_CACHE_SECONDS)
+            results = render_to_string('property/_dashboard_results.html', context, request)
+            page_cache.set(key, results, settings.DASHBOARD_CACHE_SECONDS)
+        # Sync progress changes without a data version bump, so it stays out of the cached part
+        job = latest_job()
+        return render(request, self.template_name, {
+            'dashboard_results': mark_safe(results),
+            'editable_statuses': STATUS_COLUMNS,
+            'sync_job': job_progress(job) if job else None,
+        })
+
     def get_queryset(self):
         # Added 'city' and 'city_rank' to the optimization list
         queryset = PropertyRecord.objects.all().only(
             'id','presentation_date', 'zone_name', 'final_market_name',
             'circle', 'hub', 'hub_rank', 'city', 'city_rank',
             'projected_revenue_lakhs', 'total_rent_maintenance',
+            'projected_revenue_value', 'total_rent_value',
             'status', 'ppt_link', 'ai_summary_link', 'recording_link', 'remarks'
         )
 
-        # 1. Zone Filter
-        zone_filter = self.request.GET.get('zone')
-        if zone_filter:
-            queryset = queryset.filter(zone_name=zone_filter)
+        # Zone, status, date range and revenue/rent range filters
+        queryset = filter_records(queryset, self.request.GET)
+        return order_records(queryset, requested_sort(self.request.GET))
 
-        # 2. NEW: Status Filter
-        status_filter = self.request.GET.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+    def get_context_data(self, **kwargs):
+        queryset = kwargs.pop('object_list', self.object_list)
+        params = self.request.GET
+        page = paginate_keyset(queryset, requested_sort(params), params.get('cursor'), self.per_page,
+                               before=params.get('before'))
+        context = super().get_context_data(object_list=page, **kwargs)
 
-        # 3. Date Range Filters
-        start_date = self.request.GET.get('start_date')
-        end_date = self.request.GET.get('end_date')
+        # Zone/status dropdowns with per-value counts, served from the facet cache
+        facets = get_facets()
+        context['zones'] = facets['zones']
+        context['statuses'] = facets['statuses']
 
-        if start_date:
-            queryset = queryset.filter(presentation_date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(presentation_date__lte=end_date)
+        context['current_zone'] = self.request.GET.get('zone', '')
+        context['current_status'] = self.request.GET.get('status', '')
+        context['current_sort'] = self.request.GET.get('sort', '')
+        context['search_query'] = self.request.GET.get('q', '')
+        context['sort_choices'] = SORT_CHOICES
+        context['total_count'] = cached_count(queryset, kwargs.get('data_version'))
 
-        return queryset.order_by('-presentation_date', '-id')
+        # Approval panel from the precomputed summary: zones, or a zone's circles once one is picked
+        context['analytics_by'] = 'circle' if context['current_zone'] else 'zone'
+        context['analytics'] = summarize(context['analytics_by'], zone=context['current_zone'])
+        return context
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
 
-        # Pull distinct zones
-        context['zones'] = (
-            PropertyRecord.objects.values_list('zone_name', flat=True)
-            .distinct().exclude(zone_name__isnull=True).order_by('zone_name')
-        )
+class PropertyDashboardExportView(PropertyDashboardView):
+    """The dashboard's current filters and sort as a CSV (streamed) or XLSX download."""
 
-        # Pull distinct statuses for the new filter dropdown
-        context['statuses'] = (
-            PropertyRecord.objects.values_list('status', flat=True)
-            .distinct().exclude(status__isnull=True).order_by('status')
-        )
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        filename = f"property-approvals-{timezone.localdate():%Y-%m-%d}"
 
-        context['current_zone'] = self.request.GET.get('zone', '')
-        context['current_status'] = self.request.GET.get('status', '')
-        context['total_count'] = self.get_queryset().count()
-        return context
+        if request.GET.get('format') == 'xlsx':
+            # Built on disk, then streamed back; FileResponse closes (and so deletes) it
+            fh = tempfile.TemporaryFile()
+            write_xlsx(queryset, fh)
+            fh.seek(0)
+            return streamed(request, FileResponse(fh, as_attachment=True, filename=f"{filename}.xlsx"))
+
+        response = StreamingHttpResponse(buffered(iter_csv(queryset)), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return streamed(request, response)
 
 
-# --- 2. Remarks Update View ---
+# --- 2. Record Edit View ---
 @login_required
 @require_POST
-def update_remarks(request, pk):
+def edit_record(request, pk):
+    """
+    Saves the remarks and/or status posted from the dashboard's editor modal and
+    returns the re-rendered row, so the page updates in place.
+    """
     property_record = get_object_or_404(PropertyRecord, pk=pk)
-    new_remarks = request.POST.get('remarks', '').strip()
-    property_record.remarks = new_remarks
-    property_record.save(update_fields=['remarks'])
-    messages.success(request, f"Remarks for {property_record.final_market_name} updated successfully.")
-    return redirect('property_dashboard')
+    changed = []
+    if 'remarks' in request.POST:
+        property_record.remarks = request.POST['remarks'].strip()
+        changed.append('remarks')
+    status_value = request.POST.get('status')
+    if status_value:  # Empty means "leave as is" (e.g. a status the editor does not offer)
+        if status_value not in STATUS_COLUMNS:
+            return JsonResponse({'errors': {'status': f"Unknown status: {status_value}"}}, status=400)
+        property_record.status = status_value
+        property_record.status_edited_at = timezone.now()
+        changed += ['status', 'status_edited_at']
+    if not changed:
+        return JsonResponse({'errors': {'__all__': "Nothing to update."}}, status=400)
+
+    # updated_at is listed so the edit shows up in the delta API
+    property_record.save(update_fields=changed + ['updated_at'])
+    row = render_to_string('property/_record_row.html', {
+        'property': property_record,
+        'data_version': data_version(),
+        'dashboard_cache_seconds': settings.DASHBOARD_CACHE_SECONDS,
+    }, request)
+    return JsonResponse({
+        'id': property_record.pk,
+        'remarks': property_record.remarks,
+        'status': property_record.status,
+        'row': row,
+    })
 
 
 # --- 3. The Proxy View ---
+NO_PREVIEW_URL = 'https://placehold.co/320x180?text=No+Preview'
+
+
+# Async, so a request waiting on Drive holds no worker thread when served via asgi.py
 @login_required
-def slide_proxy(request):
+async def slide_proxy(request):
     full_url = request.GET.get('url')
     if not full_url:
         return HttpResponse("No URL provided", status=400)
@@ -103,29 +179,138 @@ def slide_proxy(request):
             return HttpResponse("Invalid Drive URL", status=400)
         file_id = match.group(1)
 
-        token_path = os.path.join(settings.BASE_DIR, 'token.json')
-        if not os.path.exists(token_path):
-            return HttpResponse("Server Error: Auth Token Missing", status=500)
-
-        creds = Credentials.from_authorized_user_file(token_path)
-        service = build('drive', 'v3', credentials=creds)
-
-        file_meta = service.files().get(fileId=file_id, fields='thumbnailLink').execute()
-        thumbnail_url = file_meta.get('thumbnailLink')
+        # Memory hits and small local file reads; quick enough to do on the event loop
+        thumbnail_cache = get_thumbnail_cache()
+        cached = thumbnail_cache.get(file_id)
+        if cached:
+            content, etag = cached
+            cache_status = 'HIT'
+        elif thumbnail_cache.has_no_preview(file_id):
+            return redirect(NO_PREVIEW_URL)
+        else:
+            drive = await sync_to_async(get_drive_client, thread_sensitive=False)()
+            if drive is None:
+                return HttpResponse("Server Error: Auth Token Missing", status=500)
 
-        if not thumbnail_url:
-            return redirect('https://placehold.co/320x180?text=No+Preview')
+            # Shared with concurrent requests for the same file; shielded so one
+            # client disconnecting does not cancel the fetch for the others
+            fetched = await asyncio.shield(asyncio.wrap_future(fetch_thumbnail(drive, file_id)))
+            if fetched is None:
+                return redirect(NO_PREVIEW_URL)
+            content, etag = fetched
+            cache_status = 'MISS'
 
-        high_res_url = thumbnail_url.replace('=s220', '=s1000')
-        response = requests.get(high_res_url, timeout=10)
-        return HttpResponse(response.content, content_type="image/png")
+        # Let the browser revalidate with If-None-Match instead of re-downloading
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type="image/png")
+        response['ETag'] = etag
+        response['Cache-Control'] = f"private, max-age={settings.THUMBNAIL_BROWSER_MAX_AGE}"
+        response['X-Thumbnail-Cache'] = cache_status
+        return response
 
     except Exception as e:
         return HttpResponse(status=404)
 
 
+@login_required
+def sync_status(request):
+    """Progress of the latest sync_drive job, polled by the dashboard while one runs."""
+    job = latest_job()
+    if job is None:
+        return JsonResponse({'status': None, 'html': ''})
+    progress = job_progress(job)
+    html = render_to_string('property/_sync_status.html', {'sync_job': progress}, request)
+    return JsonResponse({**progress, 'html': html})
+
+
+@login_required
+def slide_proxy_stats(request):
+    if not request.user.is_staff:
+        return HttpResponse(status=403)
+    return JsonResponse({**get_thumbnail_cache().stats(), **fetch_stats()})
+
+
+# The app revalidates with If-None-Match / If-Modified-Since and gets a 304 when nothing changed
+@method_decorator(condition(etag_func=record_list_etag, last_modified_func=record_list_last_modified), name='get')
 class PropertyRecordListAPIView(generics.ListAPIView):
-    queryset = PropertyRecord.objects.all().order_by('-presentation_date', '-id')
     serializer_class = PropertyRecordSerializer
-    # This allows the Android app to use the same filters (?zone=...&status=...)
-    filterset_fields = ['zone_name', 'status']
\ No newline at end of file
+    pagination_class = RecordKeysetPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = PropertyRecord.objects.all()
+
+        # ?fields=... only loads those columns, plus what the keyset cursor needs
+        fields = sparse_fields(self.request)
+        if fields:
+            column, _ = SORT_KEYS[requested_sort(params)]
+            queryset = queryset.only('id', *fields, *([column] if column in FIELD_NAMES else []))
+        else:
+            queryset = queryset.defer(*INTERNAL_FIELDS, *OPT_IN_FIELDS)
+
+        # The Android app uses the dashboard's filters (?q=...&zone=...&status=...&start_date=...)
+        queryset = filter_records(queryset, params)
+        return order_records(queryset, requested_sort(params))
+
+
+class PropertyRecordExportAPIView(PropertyRecordListAPIView):
+    """
+    Every record matching the list endpoint's filters, streamed as NDJSON
+    (one JSON object per line) instead of one in-memory JSON array.
+    """
+    pagination_class = None
+
+    def get(self, request):
+        rows = iter_ndjson(self.get_queryset(), self.get_serializer())
+        return streamed(request, StreamingHttpResponse(buffered(rows), content_type='application/x-ndjson'))
+
+
+class PropertyRecordChangesAPIView(generics.GenericAPIView):
+    """
+    Delta sync for the Android app: GET ?since=<watermark from the last response>
+    returns records created/updated after it and the ids of deleted ones.
+    Omit since for the initial download; keep fetching while has_more is true.
+    """
+    serializer_class = PropertyRecordSerializer
+
+    def get(self, request):
+        try:
+            position = decode_watermark(request.query_params.get('since'))
+        except signing.SignatureExpired:
+            return Response({'detail': "Watermark expired; fetch the full list again."}, status=status.HTTP_410_GONE)
+        except signing.BadSignature:
+            return Response({'detail': "Invalid watermark."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = PropertyRecord.objects.all()
+        fields = sparse_fields(request)
+        if fields:
+            queryset = queryset.only('id', 'updated_at', *fields)
+        else:
+            queryset = queryset.defer(*INTERNAL_FIELDS, *OPT_IN_FIELDS)
+
+        limit = requested_page_size(request.query_params, RecordKeysetPagination.page_size,
+                                    RecordKeysetPagination.max_page_size)
+        updated, deleted, watermark, has_more = changes_since(position, limit, queryset)
+        return Response({
+            'since': watermark,
+            'has_more': has_more,
+            'updated': self.get_serializer(updated, many=True).data,
+            'deleted': [tombstone.record_id for tombstone in deleted],
+        })
+
+
+class ApprovalAnalyticsAPIView(generics.GenericAPIView):
+    """
+    Approval counts, approval rate and revenue/rent totals from the precomputed
+    summary: GET ?by=zone|circle|hub|month, optionally narrowed with ?zone=, ?circle=, ?hub=.
+    """
+
+    def get(self, request):
+        by = request.query_params.get('by', 'zone')
+        if by not in BREAKDOWNS:
+            return Response({'detail': f"by must be one of: {', '.join(BREAKDOWNS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        filters = {name: request.query_params.get(name) for name in ('zone', 'circle', 'hub')}
+        return Response({'by': by, 'results': summarize(by, **filters)})
@@ -3,6 +3,12 @@ ASGI config for property_approval_dashboard project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the entry point to deploy (e.g. ``gunicorn -k uvicorn.workers.UvicornWorker
+property_approval_dashboard.asgi``): slide_proxy is async and only frees its worker
+while waiting on Drive when served from here. Everything else runs as under
+wsgi.py, which still works but makes every thumbnail miss hold a thread; the
+CSV/XLSX/NDJSON exports stream chunk by chunk under either (property.exports.streamed).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'property_approval_dashboard.settings')
+# Read by settings.py, which turns off persistent database connections under ASGI
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,7 +45,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # <--- Add this line here
+    'property.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable for the ASGI slide proxy
+    'property.middleware.CompressionMiddleware',  # gzip, or br/zstd when brotli/zstandard are installed
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,6 +82,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Production SQLite profile, applied to every connection as it opens. WAL lets
+        # dashboard reads run alongside sync_drive's write transaction; writers wait up
+        # to `timeout` seconds for the lock instead of failing with "database is locked",
+        # and take it at BEGIN (IMMEDIATE), so a transaction that reads and then writes
+        # never has to be aborted to break a lock upgrade deadlock.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'  # durable under WAL except on power loss
+                'PRAGMA mmap_size=268435456;'  # 256 MB
+                'PRAGMA cache_size=-32000;'  # 32 MB
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+        # Reuse connections across requests under WSGI (the pragmas are then paid once per
+        # connection). Not under ASGI (asgi.py sets DJANGO_ASGI), where each sync_to_async
+        # thread opens its own connection and persistent ones would linger unused
+        'CONN_MAX_AGE': 0 if os.environ.get('DJANGO_ASGI') else 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -136,4 +159,61 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'property_dashboard'  # Or whatever the name is in property.urls
 LOGOUT_REDIRECT_URL = 'login'
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Slide thumbnail cache used by property.views.slide_proxy
+THUMBNAIL_CACHE_DIR = BASE_DIR / 'thumbnail_cache'
+THUMBNAIL_CACHE_MAX_DISK_BYTES = 500 * 1024 * 1024
+THUMBNAIL_CACHE_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+THUMBNAIL_BROWSER_MAX_AGE = 60 * 60  # Seconds before the browser revalidates via ETag
+THUMBNAIL_NO_PREVIEW_SECONDS = 5 * 60  # How long slide_proxy trusts Drive's "no preview" before asking again
+THUMBNAIL_MAX_UPSTREAM_FETCHES = 4  # Per process; slide_proxy misses beyond this queue for a free slot
+
+# Content-addressed store for PPTX/PDF files downloaded by sync_drive
+DRIVE_DOWNLOAD_DIR = BASE_DIR / 'downloads'
+DRIVE_DOWNLOAD_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Safety-net lifetime of a filtered PropertyRecord count; counts are keyed on the data
+# version (property/versioning.py), so record changes invalidate them sooner
+RECORD_COUNT_CACHE_SECONDS = 60 * 60
+
+# File-based so sync_drive (a separate process) can invalidate what the web workers cached
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'django_cache',
+    },
+    # Rendered dashboard results (see property/versioning.py); per process, as the file
+    # cache would spend more on culling than the rendering it saves. Every edit orphans
+    # the entries of the previous data version, so each cache is capped at a size a
+    # worker can afford to fill with them: ~160 KB per page x 200 = ~32 MB ...
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard-pages',
+        'OPTIONS': {'MAX_ENTRIES': 200},
+    },
+    # ... and ~3 KB per table row x 5000 = ~15 MB
+    'rows': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard-rows',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Safety-net lifetime for the dashboard's zone/status facets; saves and syncs invalidate them sooner
+FACET_CACHE_SECONDS = 24 * 60 * 60
+
+# Delta API (api/properties/changes/): tombstone and watermark lifetime, and how
+# long a just-written row is held back so a slower concurrent commit is not skipped.
+# A writer can wait up to the SQLite busy timeout for the lock after stamping
+# updated_at, so the hold-back covers that wait plus time to finish the transaction.
+DELTA_TOMBSTONE_DAYS = 90
+DELTA_SETTLE_SECONDS = DATABASES['default']['OPTIONS']['timeout'] + 5
+
+# Lifetime of cached dashboard HTML; entries are keyed on the data version, so edits never serve stale pages
+DASHBOARD_CACHE_SECONDS = 60 * 60
+
+# sync_drive job lock (property/jobs.py): how often a running job proves it is alive,
+# and how long without that before another run may take the job over
+SYNC_JOB_HEARTBEAT_SECONDS = 30
+SYNC_JOB_STALE_SECONDS = 5 * 60